@@ -0,0 +1,80 @@
+"""Latency of a record save through `save_record_to_db`, the content screen's save path.
+
+Run with `python bench/bench_save.py [saves]` against the configured database (`CLIO_DB_URL`;
+use a scratch copy, commit cost dominates on MariaDB). A temporary note is created under the
+first genus and deleted again at the end.
+
+- `title, then save`: the title committed on its own by `update_record_title`, then the content
+  by `save_record_to_db`, as before the save was made one transaction
+- `one transaction`: title and content changed with `set_field` and saved together inside
+  `unit_of_work("save")`, as `ContentScreen.action_save_to_db` does
+- `unchanged`: the same save without dirty fields, which sends no statement
+"""
+import sys
+import time
+
+from clio.core.state import app_state
+from clio.core.content import load_content
+from clio.core.metadata import metadata
+from clio.core.record import create_record, delete_records
+from clio.db.db import engine, get_db, unit_of_work
+from clio.db.ops import save_record_to_db, update_record_title
+
+SAVES = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+RECTYPE = "note"
+
+
+def title_then_save(content, i):
+    # Before: the title with its own commit, then the content with another
+    update_record_title(app_state.current_UUID, f"Title {i}")
+    content.set_field("note_content", f"{'text ' * 200}{i}")
+    save_record_to_db()
+
+
+def one_transaction(content, i):
+    # After: only the changed columns, title and `modify_date` with a single commit
+    content.set_field("title", f"Title {i}")
+    content.set_field("note_content", f"{'text ' * 200}{i}")
+    with unit_of_work("save"):
+        save_record_to_db()
+
+
+def unchanged(content, i):
+    with unit_of_work("save"):
+        save_record_to_db()
+
+
+PIPELINES = [("title, then save", title_then_save), ("one transaction", one_transaction), ("unchanged", unchanged)]
+
+
+def run(save, content) -> float:
+    start = time.perf_counter()
+    for i in range(SAVES):
+        save(content, i)
+    return (time.perf_counter() - start) / SAVES * 1000
+
+
+def main():
+    genera = metadata.genera()
+    if not genera:
+        sys.exit("No genus to create the benchmark record under.")
+
+    record_UUID = create_record(RECTYPE, genera[0]["UUID"])
+    try:
+        with next(get_db()) as db:
+            content = load_content(db, record_UUID, RECTYPE)
+        app_state.current_UUID, app_state.current_rectype, app_state.current_content = record_UUID, RECTYPE, content
+        results = [(name, run(save, content)) for name, save in PIPELINES]
+    finally:
+        with next(get_db()) as db:
+            delete_records(db, [{"UUID": record_UUID, "rectype": RECTYPE}])
+            db.commit()
+
+    print(f"{SAVES} saves of a {RECTYPE} on {engine.dialect.name}")
+    print(f"{'pipeline':>18} {'ms/save':>8}")
+    for name, ms in results:
+        print(f"{name:>18} {ms:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+from openai import OpenAI
+from sqlalchemy import text, bindparam
+from clio.db.db import get_db
+from clio.db.ops import upsert_embeddings
+from clio.utils.queries import SUBTREE_DEFINITION, TRASHED_DEFINITION, with_ctes
+from clio.utils.embedding_index import EMBEDDING_MODEL, CACHE_DIR
+from clio.utils.embeddings import content_fields, embedding_text, embed_texts, estimate_tokens, content_hash, TokenBucket
+
+# A `--all` run stores its start time here so an interrupted run can resume
+CHECKPOINT_PATH = os.path.join(CACHE_DIR, "embed-run.json")
+PAGE_SIZE = 500  # Records read per keyset page
+MAX_BATCH_TOKENS = 250_000  # Below the API limit on tokens per request
+
+
+##############################################################################################
+################################ SELECT RECORDS TO EMBED #####################################
+
+
+def pending_filter(mode: str, since: datetime | None, genus_uuid: str | None) -> tuple[str, str]:
+    """Return `(cte, where)` SQL fragments selecting the records to embed; records in the trash never are."""
+    definitions = [TRASHED_DEFINITION]
+    conditions = ["r.UUID NOT IN (SELECT UUID FROM trashed)"]
+
+    if mode == "missing":
+        conditions.append("e.rec_UUID IS NULL")
+    elif mode == "stale":
+        conditions.append("(e.rec_UUID IS NULL OR e.modify_date < r.modify_date)")
+    elif since is not None:
+        conditions.append("(e.rec_UUID IS NULL OR e.modify_date < :since)")
+
+    if genus_uuid:
+        definitions.append(SUBTREE_DEFINITION)
+        conditions.append("r.UUID IN (SELECT UUID FROM subtree)")
+
+    return with_ctes(*definitions), " AND ".join(conditions)
+
+
+def count_pending(db, rectypes, params, cte, where) -> int:
+    total = 0
+    for rectype, _ in rectypes:
+        total += db.execute(text(f"""
+            {cte}
+            SELECT COUNT(*) FROM record r
+            JOIN `{rectype}` c ON c.rec_UUID = r.UUID
+            LEFT JOIN embeddings e ON e.rec_UUID = r.UUID AND e.model = :model
+            WHERE {where}
+        """), params).scalar()
+    return total
+
+
+def iter_pending(db, rectypes, params, cte, where):
+    """Yield `(rec_UUID, text, stored content_hash)` for every candidate record, one keyset page at a time."""
+    for rectype, fields in rectypes:
+        columns = ", ".join(f"c.`{field}`" for field in fields)
+        query = text(f"""
+            {cte}
+            SELECT r.UUID, e.content_hash, {columns} FROM record r
+            JOIN `{rectype}` c ON c.rec_UUID = r.UUID
+            LEFT JOIN embeddings e ON e.rec_UUID = r.UUID AND e.model = :model
+            WHERE {where} AND r.UUID > :after
+            ORDER BY r.UUID
+            LIMIT {PAGE_SIZE}
+        """)
+
+        after = ""
+        while True:
+            rows = db.execute(query, {**params, "after": after}).mappings().all()
+            if not rows:
+                break
+            after = rows[-1]["UUID"]
+            for row in rows:
+                yield row["UUID"], embedding_text({field: row[field] for field in fields}), row["content_hash"]
+
+
+def iter_batches(items, batch_size: int):
+    """Pack `(rec_UUID, text, hash)` items into batches bounded by count and estimated tokens."""
+    batch, tokens = [], 0
+    for item in items:
+        cost = estimate_tokens(item[1])
+        if batch and (len(batch) >= batch_size or tokens + cost > MAX_BATCH_TOKENS):
+            yield batch
+            batch, tokens = [], 0
+        batch.append(item)
+        tokens += cost
+    if batch:
+        yield batch
+
+
+##############################################################################################
+###################################### EMBED AND STORE #######################################
+
+
+def embed_batch(batch, client, request_bucket, token_bucket) -> tuple[int, int]:
+    """Embed one batch with a single API call and upsert it. Returns `(records, tokens)`."""
+    tokens = sum(estimate_tokens(content) for _, content, _ in batch)
+    request_bucket.acquire(1)
+    token_bucket.acquire(tokens)
+
+    vectors = embed_texts([content for _, content, _ in batch], client=client)
+
+    with next(get_db()) as db:
+        upsert_embeddings(db, [(rec_UUID, vector, text_hash) for (rec_UUID, _, text_hash), vector in zip(batch, vectors)])
+        db.commit()
+
+    return len(batch), tokens
+
+
+def mark_unchanged(db, record_UUIDs: list[str]):
+    """Bump `modify_date` of embeddings whose text hash still matches, so `--stale` stops selecting them."""
+    if not record_UUIDs:
+        return
+    db.execute(
+        text("UPDATE embeddings SET modify_date = NOW() WHERE model = :model AND rec_UUID IN :uuids")
+        .bindparams(bindparam("uuids", expanding=True)),
+        {"model": EMBEDDING_MODEL, "uuids": record_UUIDs}
+    )
+    db.commit()
+
+
+def load_checkpoint(mode: str, genus: str | None) -> datetime:
+    """Start time of an interrupted `--all` run with the same arguments, or now."""
+    try:
+        with open(CHECKPOINT_PATH, "r") as file:
+            checkpoint = json.load(file)
+        if checkpoint.get("mode") == mode and checkpoint.get("genus") == genus:
+            started = datetime.fromisoformat(checkpoint["started"])
+            print(f"Resuming run started at {started:%Y-%m-%d %H:%M:%S}.")
+            return started
+    except (OSError, ValueError, KeyError):
+        pass
+
+    started = datetime.now().replace(microsecond=0)
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(CHECKPOINT_PATH, "w") as file:
+        json.dump({"mode": mode, "genus": genus, "started": started.isoformat()}, file)
+    return started
+
+
+def run_embed(mode: str = "missing", genus: str | None = None, batch_size: int = 96,
+              concurrency: int = 4, rpm: int = 3000, tpm: int = 1_000_000) -> int:
+    """Backfill embeddings for records that are missing (default), stale, or all of them.
+
+    Every batch is committed on its own, so an interrupted run resumes by being run again.
+    Returns the number of records embedded.
+    """
+    since = load_checkpoint(mode, genus) if mode == "all" else None
+
+    with next(get_db()) as db:
+        genus_uuid = None
+        if genus:
+            genus_uuid = db.execute(text("SELECT UUID FROM genus WHERE name = :name"), {"name": genus}).scalar()
+            if not genus_uuid:
+                print(f"Error: genus '{genus}' does not exist.")
+                sys.exit(1)
+
+        rectypes = [
+            (name, content_fields(schema))
+            for name, schema in db.execute(text("SELECT name, content_schema FROM rectype")).fetchall()
+        ]
+        params = {"model": EMBEDDING_MODEL, "since": since, "root_uuid": genus_uuid, "max_depth": None}
+        cte, where = pending_filter(mode, since, genus_uuid)
+
+        total = count_pending(db, rectypes, params, cte, where)
+        print(f"{total} records to embed with {EMBEDDING_MODEL}.")
+
+        client = OpenAI(max_retries=5)
+        request_bucket, token_bucket = TokenBucket(rpm), TokenBucket(tpm)
+        done = tokens = skipped = unchanged = 0
+        started = time.perf_counter()
+
+        def needs_embedding(items):
+            """Drop empty records and, unless re-embedding `all`, those whose text hash matches the stored embedding."""
+            nonlocal skipped, unchanged
+            checked = []
+            for rec_UUID, content, stored_hash in items:
+                if not content.strip():
+                    skipped += 1
+                    continue
+                text_hash = content_hash(content)
+                if text_hash == stored_hash and mode != "all":
+                    unchanged += 1
+                    checked.append(rec_UUID)
+                    if len(checked) >= PAGE_SIZE:
+                        mark_unchanged(db, checked)
+                        checked = []
+                    continue
+                yield rec_UUID, content, text_hash
+            mark_unchanged(db, checked)
+
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        pending = set()
+        try:
+            for batch in iter_batches(needs_embedding(iter_pending(db, rectypes, params, cte, where)), batch_size):
+                pending.add(executor.submit(embed_batch, batch, client, request_bucket, token_bucket))
+
+                # Keep a bounded number of batches in flight while streaming new pages
+                while len(pending) >= concurrency * 2:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        records, batch_tokens = future.result()
+                        done += records
+                        tokens += batch_tokens
+                    elapsed = time.perf_counter() - started
+                    print(f"\r{done}/{total} embedded  {done / elapsed:.1f} rec/s  {tokens / elapsed:.0f} tok/s", end="", flush=True)
+
+            for future in wait(pending).done:
+                records, batch_tokens = future.result()
+                done += records
+                tokens += batch_tokens
+
+        except KeyboardInterrupt:
+            print(f"\nInterrupted after {done} records; run the same command again to resume.")
+            return done
+
+        finally:
+            # ✅ Also when a batch failed: drop the queued batches instead of calling the API on
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"\r{done}/{total} embedded in {elapsed:.1f}s  {done / max(elapsed, 1e-9):.1f} rec/s  "
+          f"{tokens / max(elapsed, 1e-9):.0f} tok/s  ({unchanged} unchanged, {skipped} empty skipped)")
+
+    if mode == "all":
+        os.remove(CHECKPOINT_PATH)
+    return done
@@ -1,5 +1,6 @@
 import argparse
 import sys
+from datetime import timedelta
 from clio.cli.note import create_note_to_inbox
 
 def run_cli():
@@ -9,8 +10,47 @@ def run_cli():
     note_parser = subparsers.add_parser("note", help="Create a note in _in genus")
     note_parser.add_argument("text", nargs="?", help="Note content (optional)")
 
+    embed_parser = subparsers.add_parser("embed", help="Backfill record embeddings in batches")
+    embed_mode = embed_parser.add_mutually_exclusive_group()
+    embed_mode.add_argument("--all", action="store_true", help="Re-embed every record")
+    embed_mode.add_argument("--stale", action="store_true", help="Also re-embed records modified after their embedding")
+    embed_parser.add_argument("--genus", metavar="NAME", help="Only records under this genus")
+    embed_parser.add_argument("--batch-size", type=int, default=96, help="Inputs per embeddings API call")
+    embed_parser.add_argument("--concurrency", type=int, default=4, help="API calls in flight")
+    embed_parser.add_argument("--rpm", type=int, default=3000, help="Request rate limit per minute")
+    embed_parser.add_argument("--tpm", type=int, default=1_000_000, help="Token rate limit per minute")
+
+    worker_parser = subparsers.add_parser("worker", help="Run queued AI jobs (titles, embeddings)")
+    worker_parser.add_argument("--once", action="store_true", help="Exit when no jobs are due")
+    worker_parser.add_argument("--batch-size", type=int, default=32, help="Jobs claimed per kind and round")
+    worker_parser.add_argument("--poll", type=float, default=5.0, help="Seconds to wait when the queue is empty")
+
+    trash_parser = subparsers.add_parser("trash", help="List, restore or purge deleted records")
+    trash_subparsers = trash_parser.add_subparsers(dest="trash_command")
+    trash_subparsers.add_parser("list", help="Show trashed records and genera")
+    restore_parser = trash_subparsers.add_parser("restore", help="Restore a trashed record or genus")
+    restore_parser.add_argument("uuid", help="UUID of the trashed record or genus")
+    purge_parser = trash_subparsers.add_parser("purge", help="Permanently delete trashed subtrees")
+    purge_parser.add_argument("--older-than", type=float, metavar="DAYS", help="Only trash older than this")
+    purge_parser.add_argument("--batch-size", type=int, default=500, help="Records deleted per transaction")
+
+    db_parser = subparsers.add_parser("db", help="Database maintenance")
+    db_subparsers = db_parser.add_subparsers(dest="db_command")
+    schema_parser = db_subparsers.add_parser("migrate", help="Apply pending schema migrations (tables, columns, indexes)")
+    schema_parser.add_argument("--to", type=int, metavar="VERSION", help="Stop after this migration")
+    schema_parser.add_argument("--status", action="store_true", help="Show the schema version and pending migrations")
+    db_subparsers.add_parser("upgrade", help="Alias of `db migrate`")
+    migrate_parser = db_subparsers.add_parser("migrate-embeddings", help="Convert JSON embeddings to binary float32")
+    migrate_parser.add_argument("--batch-size", type=int, default=500, help="Rows converted per transaction")
+    migrate_parser.add_argument("--keep-json", action="store_true", help="Keep the legacy JSON column populated")
+
     args = parser.parse_args()
 
+    if args.command in ("embed", "worker", "trash"):  # `note` migrates itself, `db` runs them explicitly
+        from clio.db.migrate import upgrade_schema
+        for name in upgrade_schema():
+            print(f"✓ Applied schema migration: {name}")
+
     if args.command == "note":
         # Case 1: passed as argument → works
         if args.text:
@@ -35,6 +75,51 @@ def run_cli():
             except KeyboardInterrupt:
                 print("\nAborted.")
 
+    elif args.command == "embed":
+        from clio.cli.embed import run_embed
+        mode = "all" if args.all else "stale" if args.stale else "missing"
+        run_embed(mode=mode, genus=args.genus, batch_size=args.batch_size,
+                  concurrency=args.concurrency, rpm=args.rpm, tpm=args.tpm)
+
+    elif args.command == "worker":
+        from clio.cli.worker import run_worker
+        run_worker(once=args.once, batch_size=args.batch_size, poll=args.poll)
+
+    elif args.command == "trash":
+        from clio.core import trash
+        if args.trash_command == "list":
+            for item in trash.list_trash():
+                print(f"{item['trashed_at']:%Y-%m-%d %H:%M}  {item['kind']:6}  {item['UUID']}  {item['name'] or ''}")
+        elif args.trash_command == "restore":
+            kind = trash.restore(args.uuid)
+            print(f"✓ Restored {kind} {args.uuid}." if kind else f"Error: {args.uuid} is not in the trash.")
+        elif args.trash_command == "purge":
+            older_than = timedelta(days=args.older_than) if args.older_than is not None else None
+            purged = trash.purge_trash(older_than=older_than, batch_size=args.batch_size)
+            print(f"✓ Purged {purged} records.")
+        else:
+            trash_parser.print_help()
+
+    elif args.command == "db":
+        if args.db_command in ("migrate", "upgrade"):
+            from clio.db import migrate
+            if getattr(args, "status", False):
+                pending = migrate.pending_migrations()
+                print(f"Schema version {migrate.schema_version()}, {len(pending)} pending")
+                for version, name in pending:
+                    print(f"  {version:>3}  {name}")
+            else:
+                applied = migrate.migrate(target=getattr(args, "to", None))
+                for version, name in applied:
+                    print(f"✓ {version:>3}  {name}")
+                print(f"✓ Schema version {migrate.schema_version()}." if applied else "✓ Schema is up to date.")
+        elif args.db_command == "migrate-embeddings":
+            from clio.db.migrate import migrate_embeddings
+            converted = migrate_embeddings(batch_size=args.batch_size, keep_json=args.keep_json)
+            print(f"✓ Migrated {converted} embeddings to binary storage.")
+        else:
+            db_parser.print_help()
+
     else:
         parser.print_help()
 
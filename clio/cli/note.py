@@ -2,47 +2,42 @@ from clio.db.db import get_db
 from sqlalchemy import text
 import uuid
 import sys
-from clio.utils.generate_title import generate_title_from_text
-from clio.core.record import update_record_title
+from clio.core.jobs import enqueue_job, PLACEHOLDER_TITLE
+from clio.db.migrate import upgrade_schema
+from clio.core.metadata import metadata
 
 DEFAULT_GENUS = "_in"
 
 def create_note_to_inbox(note_text: str):
-    with next(get_db()) as db:
-        # Step 1: Lookup `_in` genus UUID
-        result = db.execute(
-            text("SELECT UUID FROM genus WHERE name = :name"),
-            {"name": DEFAULT_GENUS}
-        ).fetchone()
-
-        if not result:
-            print(f"Error: genus '{DEFAULT_GENUS}' does not exist.")
-            sys.exit(1)
-
-        parent_UUID = result[0]
-
-        # Step 2: Lookup rectype_id for 'note'
-        rectype_row = db.execute(
-            text("SELECT id FROM rectype WHERE name = 'note'")
-        ).fetchone()
-
-        if not rectype_row:
-            print("Error: 'note' rectype not found.")
-            sys.exit(1)
+    # ✅ Pending migrations first: the genus lookup filters on `trashed_at`, the jobs need `job`
+    upgrade_schema()
+
+    # Step 1: Lookup `_in` genus UUID and the rectype_id for 'note'
+    genus = metadata.genus_by_name(DEFAULT_GENUS)
+    if not genus:
+        print(f"Error: genus '{DEFAULT_GENUS}' does not exist.")
+        sys.exit(1)
+    parent_UUID = genus["UUID"]
+
+    rectype = metadata.rectype_by_name("note")
+    if not rectype:
+        print("Error: 'note' rectype not found.")
+        sys.exit(1)
+    rectype_id = rectype.id
 
-        rectype_id = rectype_row[0]
+    with next(get_db()) as db:
         new_UUID = str(uuid.uuid4())
 
-        # Step 3: Insert into `record`
+        # Step 2: Insert into `record`
         db.execute(
             text("""
-                INSERT INTO record (UUID, parent_UUID, rectype_id)
-                VALUES (:uuid, :parent_uuid, :rectype_id)
+                INSERT INTO record (UUID, parent_UUID, rectype_id, name)
+                VALUES (:uuid, :parent_uuid, :rectype_id, :name)
             """),
-            {"uuid": new_UUID, "parent_uuid": parent_UUID, "rectype_id": rectype_id}
+            {"uuid": new_UUID, "parent_uuid": parent_UUID, "rectype_id": rectype_id, "name": PLACEHOLDER_TITLE}
         )
 
-        # Step 4: Insert into `note`
+        # Step 3: Insert into `note`
         db.execute(
             text("""
                 INSERT INTO note (rec_UUID, note_content)
@@ -51,20 +46,12 @@ def create_note_to_inbox(note_text: str):
             {"uuid": new_UUID, "content": note_text}
         )
 
-        db.commit()
+        # Step 4: Queue title and embedding generation for `clio worker`
+        enqueue_job(db, "title", new_UUID)
+        enqueue_job(db, "embedding", new_UUID)
 
-        # Step 5: Generate title after DB insert
-        try:
-            short_text = note_text[:1000]  # Limit to first 1000 characters to save tokens
-            title = generate_title_from_text(short_text)
-            final_title = title if title else "Note"
-            update_record_title(new_UUID, final_title)
-            print(f"✓ Note saved with title: {final_title}")
-        except Exception as e:
-            fallback_title = "Note"
-            update_record_title(new_UUID, fallback_title)
-            print(f"✓ Note saved (AI title generation failed, used fallback '{fallback_title}'): {e}")
+        db.commit()
 
+    print("✓ Note saved; title and embedding queued for `clio worker`.")
 
     return new_UUID
-
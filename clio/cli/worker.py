@@ -0,0 +1,34 @@
+import time
+from clio.db.db import get_db
+from clio.db.migrate import ensure_job_table
+from clio.core.jobs import process_jobs, job_counts
+
+
+def run_worker(once: bool = False, batch_size: int = 32, poll: float = 5.0) -> int:
+    """Run queued title and embedding jobs until interrupted (or until none are due with `once`).
+
+    Several workers may run side by side; jobs are claimed with `FOR UPDATE SKIP LOCKED`.
+    Returns the number of jobs handled.
+    """
+    with next(get_db()) as db:
+        if ensure_job_table(db):
+            print("Created the `job` table.")
+
+    handled = 0
+    try:
+        while True:
+            count = process_jobs(batch_size)
+            handled += count
+            if count:
+                print(f"{handled} jobs handled", flush=True)
+            elif once:
+                break
+            else:
+                time.sleep(poll)
+    except KeyboardInterrupt:
+        print("\nStopped; unfinished jobs are picked up again after their lease expires.")
+
+    failed = {kind: count for (kind, status), count in job_counts().items() if status == "failed"}
+    if failed:
+        print("Failed jobs (out of retries): " + ", ".join(f"{kind} {count}" for kind, count in failed.items()))
+    return handled
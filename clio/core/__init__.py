@@ -1,7 +1,8 @@
 from . import state
 from . import record
 from . import genus
+from . import background
 
 
-__all__ = ["state", "record", "genus"]
+__all__ = ["state", "record", "genus", "background"]
 
@@ -0,0 +1,92 @@
+import threading
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Callable
+from clio.utils.log_util import log_message
+
+##############################################################################################
+############################ BACKGROUND EMBEDDING AND TITLE JOBS #############################
+##############################################################################################
+
+
+@dataclass
+class RecordJob:
+    """Pending network work for one record, built from a snapshot of its content."""
+    record_UUID: str
+    content: dict
+    embed: bool = False
+    title: bool = False
+    on_title: list[Callable[[str, str], None]] = field(default_factory=list)  # Run on the UI thread
+
+
+class RecordJobQueue:
+    """Runs embedding and title generation in Textual thread workers, one record at a time.
+
+    Saving the same record again while a job is queued replaces its content snapshot instead
+    of adding another job; while a job is running, the newest snapshot waits for it to finish.
+    """
+
+    def __init__(self):
+        self._pending: dict[str, RecordJob] = {}
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+
+    def submit(self, app, record_UUID: str, content: dict, embed: bool = True, title: bool = False,
+               on_title: Callable[[str, str], None] | None = None):
+        """Queue work for a record; `on_title(record_UUID, title)` is called on the UI thread."""
+        with self._lock:
+            job = self._pending.get(record_UUID)
+            if job:
+                job.content = dict(content)  # ✅ Coalesce: the latest save wins
+                job.embed |= embed
+                job.title |= title
+                log_message(f"⏳ Merged with queued job for {record_UUID}", "info")
+            else:
+                job = self._pending[record_UUID] = RecordJob(record_UUID, dict(content), embed, title)
+            if on_title:
+                job.on_title.append(on_title)
+
+            if record_UUID in self._running:
+                return
+            self._running.add(record_UUID)
+
+        app.run_worker(lambda: self._drain(app, record_UUID), thread=True,
+                       group="record-jobs", exit_on_error=False)
+
+    def _drain(self, app, record_UUID: str):
+        """Worker body: run jobs for one record until none are left."""
+        while True:
+            with self._lock:
+                job = self._pending.pop(record_UUID, None)
+                if job is None:
+                    self._running.discard(record_UUID)
+                    return
+            self._run(app, job)
+
+    def _run(self, app, job: RecordJob):
+        # Imported here: `clio.db.ops` imports the app state, which imports this package
+        from clio.db.ops import save_embeddings, update_record_title
+        from clio.utils.embeddings import embedding_text
+        from clio.utils.generate_title import generate_title_from_text
+        from clio.core.jobs import TITLE_INPUT_CHARS
+
+        if job.title:
+            try:
+                new_title = generate_title_from_text(embedding_text(job.content)[:TITLE_INPUT_CHARS])
+                if new_title and update_record_title(job.record_UUID, new_title):
+                    for callback in job.on_title:
+                        app.call_from_thread(callback, job.record_UUID, new_title)
+                elif not new_title:
+                    log_message(f"❌ Title generation failed for {job.record_UUID}", "error")
+            except Exception as e:
+                log_message(f"❌ Title generation failed for {job.record_UUID}: {e}", "error")
+
+        if job.embed:
+            try:
+                save_embeddings(SimpleNamespace(content=job.content), record_UUID=job.record_UUID)
+            except Exception as e:
+                log_message(f"❌ Embedding failed for {job.record_UUID}: {e}", "error")
+
+
+# Process-wide queue used by the screens
+record_jobs = RecordJobQueue()
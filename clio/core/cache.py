@@ -0,0 +1,124 @@
+import os
+import threading
+from collections import OrderedDict
+
+##############################################################################################
+############################ LRU CACHE OF CONTENT AND RENDERED MARKDOWN ######################
+##############################################################################################
+
+# Selecting a record again serves its content object and markdown from memory. Every write to
+# a record's content or appendices calls `content_cache.invalidate(UUID)`, which also bumps the
+# record's version, so a load that started before the write cannot store stale content.
+
+CACHE_ENTRIES = int(os.getenv("CLIO_CACHE_ENTRIES", "256"))
+CACHE_BYTES = int(os.getenv("CLIO_CACHE_BYTES", str(32 * 1024 * 1024)))
+
+
+def estimate_size(content, markdown: str | None) -> int:
+    """Rough size of an entry: the length of its text values."""
+    size = len(markdown or "")
+    for part in (content.header, content.content):
+        size += sum(len(str(value)) for value in part.values() if value is not None)
+    for items in content.appendix.values():
+        size += sum(len(str(item)) for item in items)
+    return size
+
+
+class CacheEntry:
+    __slots__ = ("content", "markdown", "version", "size")
+
+    def __init__(self, content, markdown: str | None, version: int, size: int):
+        self.content = content
+        self.markdown = markdown
+        self.version = version
+        self.size = size
+
+
+class ContentCache:
+    """LRU of `RecordContent` and rendered markdown by record UUID, bounded by entries and bytes."""
+
+    def __init__(self, max_entries: int = CACHE_ENTRIES, max_bytes: int = CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, record_UUID: str) -> int:
+        """Current version of a record; pass it to `put` to detect writes during a load."""
+        return self._versions.get(record_UUID, 0)
+
+    def __contains__(self, record_UUID: str) -> bool:
+        """Whether a valid entry exists; not counted as a lookup."""
+        entry = self._entries.get(record_UUID)
+        return entry is not None and entry.version == self.version(record_UUID)
+
+    def get(self, record_UUID: str) -> CacheEntry | None:
+        with self._lock:
+            entry = self._entries.get(record_UUID)
+            if entry is None or entry.version != self.version(record_UUID):
+                self.misses += 1
+                return None
+            self._entries.move_to_end(record_UUID)
+            self.hits += 1
+            return entry
+
+    def put(self, record_UUID: str, content, markdown: str | None = None, version: int | None = None) -> bool:
+        """Store an entry; refused if the record was invalidated since `version` was read."""
+        with self._lock:
+            current = self.version(record_UUID)
+            if version is not None and version != current:
+                return False
+            self._discard(record_UUID)
+            entry = CacheEntry(content, markdown, current, estimate_size(content, markdown))
+            if entry.size > self.max_bytes:
+                return False
+            self._entries[record_UUID] = entry
+            self._bytes += entry.size
+            self._evict()
+            return True
+
+    def invalidate(self, *record_UUIDs: str):
+        """Drop records after a write to their content, appendices or existence."""
+        with self._lock:
+            for record_UUID in record_UUIDs:
+                self._versions[record_UUID] = self.version(record_UUID) + 1
+                self._discard(record_UUID)
+
+    def clear(self):
+        with self._lock:
+            for record_UUID in list(self._entries):
+                self._versions[record_UUID] = self.version(record_UUID) + 1
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        """Counters for tuning `CLIO_CACHE_ENTRIES` and `CLIO_CACHE_BYTES`."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def _discard(self, record_UUID: str):
+        entry = self._entries.pop(record_UUID, None)
+        if entry is not None:
+            self._bytes -= entry.size
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self.evictions += 1
+
+
+# Process-wide cache used by `fetch_content` and the tree
+content_cache = ContentCache()
@@ -0,0 +1,250 @@
+import base64
+import json
+import threading
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import text, bindparam
+from clio.utils.embeddings import content_fields
+from .metadata import metadata, RectypeInfo
+
+##############################################################################################
+############################### COMPILED PER-RECTYPE CONTENT #################################
+##############################################################################################
+
+# A rectype's schema is parsed, its field lists normalized and its SQL built once; the result
+# is reused by `fetch_content`, `save_record_to_db` and the content form until the rectype
+# metadata is reloaded.
+
+LOAD_CHUNK = 500  # Records per load query
+
+# Appendix type -> (table, columns); `appendix` keys and rows as `render_markdown` expects them
+APPENDIX_TABLES = {
+    "note": ("rec_note", ("note",)),
+    "source": ("rec_source", ("name", "author", "year")),
+    "url": ("rec_url", ("title", "url")),
+}
+
+
+def parse_time(value: str) -> timedelta:
+    """`TIME` as text (`-838:59:59.000000` at most) to the `timedelta` the driver returns."""
+    sign = -1 if value.startswith("-") else 1
+    hours, minutes, seconds = value.lstrip("-").split(":")
+    return sign * timedelta(hours=int(hours), minutes=int(minutes), seconds=float(seconds))
+
+
+BINARY = ("TO_BASE64({})", base64.b64decode)  # The newlines TO_BASE64 inserts are skipped on decoding
+
+# Column types JSON does not carry faithfully: `(SQL wrapper or None, decoder)` to get the driver's value back.
+# Dates come back as text, DECIMAL would become a float, and binary data is not valid JSON text.
+JSON_COLUMN_TYPES = {
+    "date": (None, date.fromisoformat),
+    "datetime": (None, datetime.fromisoformat),
+    "timestamp": (None, datetime.fromisoformat),
+    "time": ("CAST({} AS CHAR)", parse_time),
+    "decimal": ("CAST({} AS CHAR)", Decimal),
+    "binary": BINARY, "varbinary": BINARY,
+    "tinyblob": BINARY, "blob": BINARY, "mediumblob": BINARY, "longblob": BINARY,
+}
+
+
+def json_object(columns, alias: str, types: dict[str, str]) -> str:
+    """`JSON_OBJECT` of `columns`, wrapping those whose type (`column -> DATA_TYPE`) needs it."""
+    values = []
+    for column in columns:
+        value = f"{alias}.`{column}`"
+        wrapper = JSON_COLUMN_TYPES.get(types.get(column), (None, None))[0]
+        values.append(f"'{column}', {wrapper.format(value) if wrapper else value}")
+    return "JSON_OBJECT(" + ", ".join(values) + ")"
+
+
+def json_decoders(columns, types: dict[str, str]) -> dict:
+    """`column -> decoder` for the columns `json_object` returns as text."""
+    return {column: JSON_COLUMN_TYPES[types[column]][1] for column in columns if types.get(column) in JSON_COLUMN_TYPES}
+
+
+def field_list(value) -> list[str]:
+    """Schema entries may be a single field name or a list of them."""
+    if not value:
+        return []
+    return [value] if isinstance(value, str) else list(value)
+
+
+def form_value(value) -> str:
+    """Value as the content form shows it; `None` and `""` (or `1999` and `"1999"`) are the same."""
+    return "" if value is None else str(value)
+
+
+class RecordContent:
+    """Loaded content of one record: `header`, `content` and `appendix` dicts.
+
+    `original` holds the header and content values as loaded (or last saved) and `dirty` the
+    fields changed since, so a save writes only those columns.
+    """
+
+    __slots__ = ("header", "content", "appendix", "appendix_items", "original", "dirty")
+    rectype = None  # Set on the per-rectype subclasses
+
+    def __init__(self, header: dict | None = None, content: dict | None = None, appendix: dict | None = None):
+        self.header = header if header is not None else {}
+        self.content = content if content is not None else {}
+        self.appendix = appendix if appendix is not None else {}
+        self.appendix_items = []  # `(appendix_type, UUID, row)` as loaded, for removal by UUID
+        self.original = {}
+        self.dirty = set()
+        self.mark_clean()
+
+    def set_field(self, field: str, value) -> bool:
+        """Set a header or content field and track whether it differs from the original; False if unknown."""
+        if field in self.header:
+            self.header[field] = value
+        elif field in self.content:
+            self.content[field] = value
+        else:
+            return False
+
+        if form_value(value) == form_value(self.original.get(field)):
+            self.dirty.discard(field)
+        else:
+            self.dirty.add(field)
+        return True
+
+    def mark_clean(self):
+        """Current values become the original ones, after loading or saving."""
+        self.original = {**self.content, **self.header}
+        self.dirty.clear()
+
+    def as_dict(self) -> dict:
+        return {"rectype": self.rectype, "header": self.header, "content": self.content, "appendix": self.appendix}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.as_dict()!r})"
+
+
+class CompiledRectype:
+    """Field lists, content class and prepared statements of one rectype."""
+
+    def __init__(self, info: RectypeInfo):
+        schema = info.content_schema
+        self.info = info
+        self.rectype = info.name
+        self.header_fields = [field for field in field_list(schema.get("header")) if field != "rec_UUID"]
+        self.content_fields = [field for field in content_fields(schema) if field != "rec_UUID"]
+        self.appendix = field_list(schema.get("appendix"))
+        self.columns = list(dict.fromkeys(self.header_fields + self.content_fields))
+
+        self.content_class = type(f"{info.name.capitalize()}Content", (RecordContent,),
+                                  {"__slots__": (), "rectype": info.name})
+
+        # ✅ Column types, so values come back from `JSON_OBJECT` as the driver would return them
+        self.types = {"content": metadata.column_types(info.name)}
+        self.decoders = {"content": json_decoders(self.columns, self.types["content"])}
+        for appendix_type in self.appendix:
+            if appendix_type in APPENDIX_TABLES:
+                table, columns = APPENDIX_TABLES[appendix_type]
+                self.types[appendix_type] = metadata.column_types(table)
+                self.decoders[appendix_type] = json_decoders(columns, self.types[appendix_type])
+
+        self.load_statement = self._load_statement()
+        self._update_statements = {}
+        self._lock = threading.Lock()
+
+    def _load_statement(self):
+        """Content row plus all appendix rows of `:uuids`, as `part, rec_UUID, item_UUID, data` (JSON)."""
+        branches = [f"""
+            SELECT 'content' AS part, c.rec_UUID, NULL AS item_UUID, {json_object(self.columns, "c", self.types["content"])} AS data
+            FROM `{self.rectype}` c WHERE c.rec_UUID IN :uuids
+        """]
+        for appendix_type in self.appendix:
+            if appendix_type not in APPENDIX_TABLES:
+                continue
+            table, columns = APPENDIX_TABLES[appendix_type]
+            branches.append(f"""
+                SELECT '{appendix_type}', a.rec_UUID, a.UUID, {json_object(columns, "a", self.types[appendix_type])}
+                FROM `{table}` a WHERE a.rec_UUID IN :uuids
+            """)
+        return text("UNION ALL".join(branches)).bindparams(bindparam("uuids", expanding=True))
+
+    def update_statement(self, columns: tuple[str, ...]):
+        """UPDATE for exactly `columns` (the changed ones); memoized per column set."""
+        statement = self._update_statements.get(columns)
+        if statement is None:
+            assignments = ", ".join(f"`{column}` = :{column}" for column in columns)
+            statement = text(f"UPDATE `{self.rectype}` SET {assignments} WHERE rec_UUID = :record_UUID")
+            with self._lock:
+                self._update_statements[columns] = statement
+        return statement
+
+    def contents_from_rows(self, rows) -> dict[str, RecordContent]:
+        """Content objects from `load_statement` rows; UNION ALL parts arrive in any order."""
+        contents, items = {}, []
+        for part, record_UUID, item_UUID, data in rows:
+            data = json.loads(data) if isinstance(data, str) else data
+            for column, decode in self.decoders.get(part, {}).items():
+                if data.get(column) is not None:
+                    data[column] = decode(data[column])
+            if part == "content":
+                contents[record_UUID] = self.new_content(data)
+            else:
+                items.append((part, record_UUID, item_UUID, data))
+
+        for content in contents.values():
+            content.appendix = {f"{appendix_type}s": [] for appendix_type in self.appendix if appendix_type in APPENDIX_TABLES}
+        for appendix_type, record_UUID, item_UUID, data in items:
+            content = contents.get(record_UUID)
+            if content is None:
+                continue
+            content.appendix[f"{appendix_type}s"].append(data["note"] if appendix_type == "note" else data)
+            content.appendix_items.append((appendix_type, item_UUID, data))
+        return contents
+
+    def new_content(self, row=None) -> RecordContent:
+        """Content object filled from a content row (or empty)."""
+        row = row or {}
+        return self.content_class(
+            header={field: row.get(field, "N/A") for field in self.header_fields},
+            content={field: row.get(field, "") for field in self.content_fields},
+        )
+
+
+_compiled: dict[str, CompiledRectype] = {}
+
+
+def compiled_rectype(rectype: str) -> CompiledRectype | None:
+    """Compiled form of a rectype, rebuilt only when its metadata was reloaded."""
+    info = metadata.rectype_by_name(rectype)
+    if info is None:
+        return None
+    compiled = _compiled.get(rectype)
+    if compiled is None or compiled.info is not info:
+        compiled = _compiled[rectype] = CompiledRectype(info)
+    return compiled
+
+
+##############################################################################################
+################################# CONTENT AND APPENDIX LOADER ################################
+
+
+def load_contents(db, records: dict[str, str]) -> dict[str, RecordContent]:
+    """Content and appendices of records given as `UUID -> rectype`.
+
+    Each rectype's records are loaded with its `load_statement`, one round trip per chunk of
+    `LOAD_CHUNK` records. Records without a content row are missing from the result.
+    """
+    by_rectype: dict[str, list[str]] = {}
+    for record_UUID, rectype in records.items():
+        by_rectype.setdefault(rectype, []).append(record_UUID)
+
+    contents = {}
+    for rectype, uuids in by_rectype.items():
+        compiled = compiled_rectype(rectype)
+        if compiled is None:
+            continue
+        for start in range(0, len(uuids), LOAD_CHUNK):
+            rows = db.execute(compiled.load_statement, {"uuids": uuids[start:start + LOAD_CHUNK]}).fetchall()
+            contents.update(compiled.contents_from_rows(rows))
+    return contents
+
+
+def load_content(db, record_UUID: str, rectype: str) -> RecordContent | None:
+    """Content and appendices of one record with a single query."""
+    return load_contents(db, {record_UUID: rectype}).get(record_UUID)
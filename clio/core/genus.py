@@ -1,6 +1,7 @@
 import uuid
 from sqlalchemy import text
-from ..db.db import engine
+from ..db.db import get_db
+from .metadata import metadata
 
 class GenusDB:
     """Handles CRUD operations for genus using raw SQL."""
@@ -12,35 +13,43 @@ class GenusDB:
         query = text(
             "INSERT INTO genus (UUID, name, description, genus_type_id) VALUES (:UUID, :name, :description, :genus_type_id);"
         )
-        with engine.connect() as connection:
+        with next(get_db()) as connection:
             connection.execute(
                 query,
                 {"UUID": genus_uuid, "name": name, "description": description, "genus_type_id": genus_type_id}
             )
             connection.commit()
+        metadata.invalidate("genus")
         return genus_uuid  # Return UUID
 
     @staticmethod
     def get_genus(genus_id: str):
-        """Retrieve a genus by UUID."""
-        query = text("SELECT * FROM genus WHERE id = :genus_id;")
-        with engine.connect() as connection:
+        """Retrieve `name, description, genus_type_id` of a genus by UUID."""
+        query = text("SELECT name, description, genus_type_id FROM genus WHERE UUID = :genus_id;")
+        with next(get_db()) as connection:
             result = connection.execute(query, {"genus_id": genus_id})
             return result.fetchone()
 
     @staticmethod
-    def update_genus(genus_id: str, shortname: str, longname: str):
+    def update_genus(genus_id: str, name: str, description: str, genus_type_id: int):
         """Update a genus record by UUID."""
-        query = text("UPDATE genus SET shortname = :shortname, longname = :longname WHERE id = :genus_id;")
-        with engine.connect() as connection:
-            connection.execute(query, {"genus_id": genus_id, "shortname": shortname, "longname": longname})
+        query = text("""
+            UPDATE genus SET name = :name, description = :description, genus_type_id = :genus_type_id
+            WHERE UUID = :genus_id;
+        """)
+        with next(get_db()) as connection:
+            connection.execute(
+                query,
+                {"genus_id": genus_id, "name": name, "description": description, "genus_type_id": genus_type_id}
+            )
             connection.commit()
+        metadata.invalidate("genus")
 
     @staticmethod
     def delete_genus(genus_id: str):
         """Delete a genus record by UUID."""
         query = text("DELETE FROM genus WHERE uuid = :genus_id;")
-        with engine.connect() as connection:
+        with next(get_db()) as connection:
             connection.execute(query, {"genus_id": genus_id})
             connection.commit()
-
+        metadata.invalidate("genus")
@@ -0,0 +1,198 @@
+import os
+import uuid
+from sqlalchemy import text, bindparam
+from clio.db.db import get_db
+from clio.db.ops import upsert_embeddings
+from clio.utils.embedding_index import EMBEDDING_MODEL
+from clio.utils.embeddings import content_fields, embedding_text, embed_texts, content_hash
+from clio.utils.generate_title import generate_title_from_text
+from clio.utils.log_util import log_message
+from clio.utils.queries import TRASHED_CTE
+
+##############################################################################################
+######################### DURABLE JOB QUEUE FOR DEFERRED AI WORK #############################
+##############################################################################################
+
+# One row per (kind, record); enqueueing again while a job waits or runs just re-arms it.
+# Finished jobs are deleted, jobs out of attempts stay behind with status 'failed'.
+
+PLACEHOLDER_TITLE = "Note"  # Name of quick notes until their title job has run
+
+MAX_ATTEMPTS = int(os.getenv("CLIO_JOB_MAX_ATTEMPTS", "6"))
+BACKOFF_BASE = 30       # Seconds before the first retry, doubled per attempt
+BACKOFF_MAX = 3600      # Upper bound on the retry delay
+LEASE_SECONDS = 600     # A claimed job whose worker died is picked up again after this
+TITLE_INPUT_CHARS = 1000  # Text sent for title generation, to save tokens
+
+
+def enqueue_job(db, kind: str, record_UUID: str):
+    """Queue `kind` work for a record inside the caller's transaction; the caller commits."""
+    db.execute(text("""
+        INSERT INTO job (kind, rec_UUID) VALUES (:kind, :uuid)
+        ON DUPLICATE KEY UPDATE status = 'pending', attempts = 0, run_after = NOW(),
+                                locked_by = NULL, locked_until = NULL, last_error = NULL, create_date = NOW()
+    """), {"kind": kind, "uuid": record_UUID})
+
+
+def claim_jobs(kind: str, limit: int) -> tuple[str, list]:
+    """Lock up to `limit` due jobs of one kind for this worker. Returns `(token, jobs)`."""
+    token = uuid.uuid4().hex
+    with next(get_db()) as db:
+        jobs = db.execute(text("""
+            SELECT id, rec_UUID, attempts, create_date FROM job
+            WHERE kind = :kind
+              AND ((status = 'pending' AND run_after <= NOW())
+                   OR (status = 'running' AND locked_until < NOW()))
+            ORDER BY run_after, id
+            LIMIT :limit
+            FOR UPDATE SKIP LOCKED
+        """), {"kind": kind, "limit": limit}).mappings().all()
+
+        if jobs:
+            db.execute(text("""
+                UPDATE job SET status = 'running', attempts = attempts + 1, locked_by = :token,
+                               locked_until = NOW() + INTERVAL :lease SECOND
+                WHERE id IN :ids
+            """).bindparams(bindparam("ids", expanding=True)),
+                {"token": token, "lease": LEASE_SECONDS, "ids": [job["id"] for job in jobs]})
+        db.commit()
+
+    return token, jobs
+
+
+def finish_jobs(token: str, results: dict[int, str | None]):
+    """Delete succeeded jobs and schedule retries for failed ones (`results`: job id -> error or None).
+
+    Jobs re-armed by `enqueue_job` while they ran no longer carry `token` and are left alone.
+    """
+    done = [job_id for job_id, error in results.items() if error is None]
+    with next(get_db()) as db:
+        if done:
+            db.execute(text("DELETE FROM job WHERE id IN :ids AND locked_by = :token")
+                       .bindparams(bindparam("ids", expanding=True)), {"ids": done, "token": token})
+
+        for job_id, error in results.items():
+            if error is None:
+                continue
+            db.execute(text("""
+                UPDATE job SET status = IF(attempts >= :max_attempts, 'failed', 'pending'),
+                               run_after = NOW() + INTERVAL LEAST(:base * POW(2, attempts - 1), :cap) SECOND,
+                               locked_by = NULL, locked_until = NULL, last_error = :error
+                WHERE id = :id AND locked_by = :token
+            """), {"max_attempts": MAX_ATTEMPTS, "base": BACKOFF_BASE, "cap": BACKOFF_MAX,
+                   "error": error[:2000], "id": job_id, "token": token})
+        db.commit()
+
+
+##############################################################################################
+######################################### HANDLERS ###########################################
+
+
+def fetch_record_texts(db, record_UUIDs: list[str]) -> dict[str, str]:
+    """Embedding text of each record, read from its rectype table; records in the trash are left out."""
+    rows = db.execute(text(f"""
+        {TRASHED_CTE}
+        SELECT r.UUID, rt.name, rt.content_schema FROM record r
+        JOIN rectype rt ON rt.id = r.rectype_id
+        WHERE r.UUID IN :uuids AND r.UUID NOT IN (SELECT UUID FROM trashed)
+    """).bindparams(bindparam("uuids", expanding=True)), {"uuids": record_UUIDs}).fetchall()
+
+    by_rectype: dict[tuple[str, str], list[str]] = {}
+    for record_UUID, rectype, schema in rows:
+        by_rectype.setdefault((rectype, schema), []).append(record_UUID)
+
+    texts = {}
+    for (rectype, schema), uuids in by_rectype.items():
+        fields = content_fields(schema)
+        columns = ", ".join(f"`{field}`" for field in fields)
+        for row in db.execute(text(f"SELECT rec_UUID, {columns} FROM `{rectype}` WHERE rec_UUID IN :uuids")
+                              .bindparams(bindparam("uuids", expanding=True)), {"uuids": uuids}).mappings():
+            texts[row["rec_UUID"]] = embedding_text({field: row[field] for field in fields})
+    return texts
+
+
+def handle_embedding_jobs(jobs) -> dict[int, str | None]:
+    """Embed all records of the batch with one API call, skipping unchanged content."""
+    with next(get_db()) as db:
+        texts = fetch_record_texts(db, [job["rec_UUID"] for job in jobs])
+        stored = dict(db.execute(text("""
+            SELECT rec_UUID, content_hash FROM embeddings WHERE rec_UUID IN :uuids AND model = :model
+        """).bindparams(bindparam("uuids", expanding=True)),
+            {"uuids": list(texts) or [""], "model": EMBEDDING_MODEL}).fetchall())
+
+        batch = []
+        for record_UUID, content in texts.items():
+            text_hash = content_hash(content)
+            if content.strip() and stored.get(record_UUID) != text_hash:
+                batch.append((record_UUID, content, text_hash))
+
+        if batch:
+            vectors = embed_texts([content for _, content, _ in batch])
+            upsert_embeddings(db, [(record_UUID, vector, text_hash)
+                                   for (record_UUID, _, text_hash), vector in zip(batch, vectors)])
+            db.commit()
+
+    # Deleted or trashed records and empty or unchanged content need no work either
+    return {job["id"]: None for job in jobs}
+
+
+def handle_title_jobs(jobs) -> dict[int, str | None]:
+    """Generate a title per record; only records still named `PLACEHOLDER_TITLE` are renamed."""
+    with next(get_db()) as db:
+        texts = fetch_record_texts(db, [job["rec_UUID"] for job in jobs])
+
+    results = {}
+    for job in jobs:
+        content = texts.get(job["rec_UUID"], "")
+        if not content.strip():
+            results[job["id"]] = None
+            continue
+
+        title = generate_title_from_text(content[:TITLE_INPUT_CHARS])
+        if not title:
+            results[job["id"]] = "no title returned"
+            continue
+
+        with next(get_db()) as db:
+            # ✅ A name set by the user meanwhile is kept; edits, saves and trash round trips are not renames
+            db.execute(text("""
+                UPDATE record SET name = :title
+                WHERE UUID = :uuid AND name = :placeholder
+            """), {"title": title, "uuid": job["rec_UUID"], "placeholder": PLACEHOLDER_TITLE})
+            db.commit()
+        results[job["id"]] = None
+    return results
+
+
+JOB_HANDLERS = {
+    "title": handle_title_jobs,
+    "embedding": handle_embedding_jobs,
+}
+
+
+def process_jobs(batch_size: int = 32) -> int:
+    """Claim and run one batch of every job kind. Returns the number of jobs handled."""
+    handled = 0
+    for kind, handler in JOB_HANDLERS.items():
+        token, jobs = claim_jobs(kind, batch_size)
+        if not jobs:
+            continue
+
+        try:
+            results = handler(jobs)
+        except Exception as e:
+            results = {job["id"]: f"{type(e).__name__}: {e}" for job in jobs}
+
+        failed = sum(error is not None for error in results.values())
+        if failed:
+            log_message(f"❌ {failed} of {len(jobs)} {kind} jobs failed; retrying later", "warning")
+        finish_jobs(token, results)
+        handled += len(jobs)
+    return handled
+
+
+def job_counts() -> dict[tuple[str, str], int]:
+    """Number of jobs per `(kind, status)`."""
+    with next(get_db()) as db:
+        rows = db.execute(text("SELECT kind, status, COUNT(*) FROM job GROUP BY kind, status")).fetchall()
+    return {(kind, status): count for kind, status, count in rows}
@@ -0,0 +1,122 @@
+import json
+import threading
+from sqlalchemy import text
+from ..db.db import get_db
+
+##############################################################################################
+################################ PROCESS-WIDE METADATA CACHE #################################
+##############################################################################################
+
+# Rectypes, genus types, relation types and genera change rarely, so they are loaded once per
+# process and served from memory. Tree nodes and rows only need to carry the `rectype_id`.
+# Code that writes one of these tables calls `metadata.invalidate()` afterwards.
+
+
+class RectypeInfo:
+    """Metadata of one record type, as stored in the `rectype` table."""
+
+    __slots__ = ("id", "name", "icon", "content_schema", "content_caption", "content_render_class")
+
+    def __init__(self, id: int, name: str, icon: str | None, content_schema, content_caption: str, content_render_class: str):
+        self.id = id
+        self.name = name
+        self.icon = icon or " "
+        self.content_schema = json.loads(content_schema) if isinstance(content_schema, str) else (content_schema or {})
+        self.content_caption = content_caption
+        self.content_render_class = content_render_class or "default"
+
+
+# Query per cached table; each is loaded on its first lookup, independently of the others
+METADATA_QUERIES = {
+    "rectype": "SELECT id, name, icon, content_schema, content_caption, content_render_class FROM rectype",
+    "genus_type": "SELECT id, shortname, longname FROM genus_type ORDER BY id",
+    "reltype": "SELECT id, name FROM reltype ORDER BY name",
+    "genus": "SELECT UUID, name, description, genus_type_id FROM genus WHERE trashed_at IS NULL ORDER BY name",
+    "column": """
+        SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name, DATA_TYPE AS data_type
+        FROM information_schema.COLUMNS WHERE TABLE_SCHEMA = DATABASE()
+    """,
+}
+
+
+class MetadataCache:
+    """Lookup tables loaded with one query each on first use and kept until invalidated."""
+
+    def __init__(self):
+        self._tables: dict[str, list] = {}
+        self._rectypes_by_id: dict[int, RectypeInfo] = {}
+        self._rectypes_by_name: dict[str, RectypeInfo] = {}
+        self._lock = threading.Lock()
+
+    def _rows(self, table: str) -> list:
+        rows = self._tables.get(table)
+        if rows is None:
+            rows = self.load(table)
+        return rows
+
+    def load(self, table: str) -> list:
+        """(Re)load one table from the database."""
+        with next(get_db()) as db:
+            rows = [dict(row) for row in db.execute(text(METADATA_QUERIES[table])).mappings().all()]
+
+        with self._lock:
+            if table == "rectype":
+                infos = [RectypeInfo(**row) for row in rows]
+                self._rectypes_by_id = {info.id: info for info in infos}
+                self._rectypes_by_name = {info.name: info for info in infos}
+            self._tables[table] = rows
+        return rows
+
+    def invalidate(self, *tables: str):
+        """Drop the given tables (all if none given); they are reloaded on the next lookup."""
+        with self._lock:
+            for table in tables or list(self._tables):
+                self._tables.pop(table, None)
+
+    ########### RECTYPES ###########
+
+    def rectype(self, rectype_id: int) -> RectypeInfo:
+        self._rows("rectype")
+        if rectype_id not in self._rectypes_by_id:
+            self.load("rectype")  # A rectype added since the last load
+        return self._rectypes_by_id[rectype_id]
+
+    def rectype_by_name(self, name: str) -> RectypeInfo | None:
+        self._rows("rectype")
+        if name not in self._rectypes_by_name:
+            self.load("rectype")
+        return self._rectypes_by_name.get(name)
+
+    def rectype_names(self) -> list[str]:
+        return [row["name"] for row in self._rows("rectype")]
+
+    ########### GENUS TYPES, RELTYPES, GENERA ###########
+
+    def genus_types(self) -> list[dict]:
+        """`id, shortname, longname` of every genus type."""
+        return self._rows("genus_type")
+
+    def reltypes(self) -> list[dict]:
+        """`id, name` of every relation type, sorted by name."""
+        return self._rows("reltype")
+
+    def genera(self) -> list[dict]:
+        """Genera that are not in the trash, sorted by name."""
+        return self._rows("genus")
+
+    def genus_by_name(self, name: str) -> dict | None:
+        for rows in (self.genera, lambda: self.load("genus")):  # Reload once on a miss
+            for genus in rows():
+                if genus["name"] == name:
+                    return genus
+        return None
+
+    ########### COLUMN TYPES ###########
+
+    def column_types(self, table: str) -> dict[str, str]:
+        """`column -> DATA_TYPE` (e.g. `decimal`, `datetime`) of one table."""
+        return {row["column_name"]: row["data_type"].lower() for row in self._rows("column") if row["table_name"] == table}
+
+
+# Process-wide cache
+metadata = MetadataCache()
@@ -0,0 +1,88 @@
+import asyncio
+import os
+import threading
+from textual.worker import get_current_worker
+from clio.db.db import get_db
+from clio.utils.log_util import log_message
+from clio.utils.markdown_utils import build_markdown
+from .cache import content_cache
+from .content import load_contents
+from .metadata import metadata
+
+##############################################################################################
+############################ SPECULATIVE PREFETCH OF NEARBY RECORDS ##########################
+##############################################################################################
+
+# While the cursor moves through the tree, the records around it are loaded into the content
+# cache in a thread worker, so selecting one of them needs no database round trip. Every new
+# request supersedes the previous one: its worker is cancelled (exclusive group) and checks the
+# generation counter before each query.
+
+PREFETCH = os.getenv("CLIO_PREFETCH", "1") != "0"
+PREFETCH_CHILDREN = int(os.getenv("CLIO_PREFETCH_CHILDREN", "20"))  # Children loaded after an expand
+
+
+class Prefetcher:
+    """Loads content and markdown of records into `content_cache` ahead of selection."""
+
+    def __init__(self):
+        self.generation = 0
+        self.loaded = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+        self._worker = None  # Worker of the latest request and the records it loads
+        self._loading: set[str] = set()
+
+    def schedule(self, app, records: dict[str, str]):
+        """Prefetch `UUID -> rectype`, cancelling the request before it."""
+        if not PREFETCH:
+            return
+        with self._lock:
+            self.generation += 1
+            generation = self.generation
+
+        wanted = {record_UUID: rectype for record_UUID, rectype in records.items() if record_UUID not in content_cache}
+        if not wanted:
+            return
+        self._loading = set(wanted)
+        self._worker = app.run_worker(lambda: self._load(generation, wanted), thread=True,
+                                      group="prefetch", exclusive=True, exit_on_error=False)
+
+    async def wait_for(self, record_UUID: str):
+        """Wait for a prefetch still loading `record_UUID`, so a selection reads its result instead of querying again."""
+        worker = self._worker
+        if worker is None or record_UUID not in self._loading:
+            return
+        # Polled: `Worker.wait` would mark the prefetch cancelled when the waiting task is cancelled
+        while not worker.is_finished:
+            await asyncio.sleep(0.01)
+
+    def _load(self, generation: int, records: dict[str, str]):
+        """Worker body: one query per rectype, stopping as soon as the request is out of date."""
+        worker = get_current_worker()
+        versions = {record_UUID: content_cache.version(record_UUID) for record_UUID in records}
+
+        by_rectype: dict[str, list[str]] = {}
+        for record_UUID, rectype in records.items():
+            by_rectype.setdefault(rectype, []).append(record_UUID)
+
+        for rectype, uuids in by_rectype.items():
+            if worker.is_cancelled or generation != self.generation:
+                self.cancelled += 1
+                return
+
+            info = metadata.rectype_by_name(rectype)
+            with next(get_db()) as db:
+                contents = load_contents(db, {record_UUID: rectype for record_UUID in uuids})
+
+            # ✅ Same markdown `render_markdown` produces on selection; refused if the record was written meanwhile
+            for record_UUID, content in contents.items():
+                markdown = build_markdown(content, rectype, (info.content_caption if info else None) or "Content")
+                if content_cache.put(record_UUID, content, markdown, version=versions[record_UUID]):
+                    self.loaded += 1
+
+        log_message(f"Prefetched {len(records)} records", "debug")
+
+
+# Process-wide prefetcher used by the tree
+prefetcher = Prefetcher()
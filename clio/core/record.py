@@ -1,6 +1,7 @@
-from sqlalchemy import text
+from sqlalchemy import text, bindparam
 from ..db.db import get_db
 from clio.utils.log_util import log_message
+from .metadata import metadata
 import uuid
 
 
@@ -25,19 +26,13 @@ def create_record(rectype: str, current_UUID: str):
     """Create a new record with the given rectype, using current_UUID as the parent."""
     new_UUID = str(uuid.uuid4())  # Generate a unique UUID
 
-    with next(get_db()) as db:
-        # Get the rectype_id from the rectype table
-        result = db.execute(
-            text("SELECT id FROM rectype WHERE name = :rectype"),
-            {"rectype": rectype.lower()},
-        )
-        rectype_id_row = result.fetchone()
-
-        if not rectype_id_row:
-            raise ValueError(f"Record type '{rectype}' not found in rectype table")
-
-        rectype_id = rectype_id_row[0]  # Extract rectype_id
+    # Get the rectype_id from the metadata cache
+    info = metadata.rectype_by_name(rectype.lower())
+    if info is None:
+        raise ValueError(f"Record type '{rectype}' not found in rectype table")
+    rectype_id = info.id
 
+    with next(get_db()) as db:
         # Insert the record into the `record` table
         db.execute(
             text("""
@@ -58,54 +53,30 @@ def create_record(rectype: str, current_UUID: str):
     
     return new_UUID  # Return the new record UUID
 
-from sqlalchemy.sql import text
 
-def recursive_delete(record_uuid):
-    """Recursively delete a record and all its children."""
-    
-    def query_children(uuid):
-        """Retrieve all child records of a given parent UUID."""
-        with next(get_db()) as db:
-            child_query = text("""
-                SELECT record.UUID, rectype.name AS rectype 
-                FROM record 
-                JOIN rectype ON record.rectype_id = rectype.id 
-                WHERE parent_UUID = :parent_uuid
-            """)
-            return db.execute(child_query, {"parent_uuid": uuid}).mappings().all()
-
-    def delete_record(uuid, rectype):
-        """Delete a single record from the content and record tables."""
-        with next(get_db()) as db:
-            delete_content_query = text(f"DELETE FROM `{rectype}ì` WHERE rec_UUID = :record_uuid")
-            db.execute(delete_content_query, {"record_uuid": uuid})
+DELETE_CHUNK = 1000  # UUIDs per `IN (...)` list
 
-            delete_record_query = text("DELETE FROM record WHERE UUID = :record_uuid")
-            db.execute(delete_record_query, {"record_uuid": uuid})
 
-            db.commit()
-            log_message(f"Deleted record {uuid} from '{rectype}' and 'record' tables.", "info")
+def delete_records(db, rows) -> dict[str, int]:
+    """Delete `UUID, rectype` rows with one statement per content table and chunk; the caller commits.
 
-    # Step 1: Fetch children
-    children = query_children(record_uuid)
+    Embeddings, appendices and queued jobs go with the records (ON DELETE CASCADE).
+    Returns the number of records deleted per rectype.
+    """
+    by_rectype: dict[str, list[str]] = {}
+    for row in rows:
+        by_rectype.setdefault(row["rectype"], []).append(row["UUID"])
 
-    if not children:  
-        # Step 2: If no children, delete the record
-        with next(get_db()) as db:
-            result = db.execute(
-                text("SELECT rectype.name FROM record JOIN rectype ON record.rectype_id = rectype.id WHERE record.UUID = :uuid"),
-                {"uuid": record_uuid}
-            ).fetchone()
-        
-        if result:
-            rectype = result[0]
-            delete_record(record_uuid, rectype)
-    else:
-        # Step 3: If there are children, recursively delete them first
-        for child in children:
-            recursive_delete(child["UUID"])
-
-        # After deleting children, delete the parent
-        recursive_delete(record_uuid)
+    for rectype, uuids in by_rectype.items():
+        delete_content_query = text(f"DELETE FROM `{rectype}` WHERE rec_UUID IN :uuids").bindparams(
+            bindparam("uuids", expanding=True))
+        for start in range(0, len(uuids), DELETE_CHUNK):
+            db.execute(delete_content_query, {"uuids": uuids[start:start + DELETE_CHUNK]})
 
+    all_uuids = [row["UUID"] for row in rows]
+    delete_record_query = text("DELETE FROM record WHERE UUID IN :uuids").bindparams(
+        bindparam("uuids", expanding=True))
+    for start in range(0, len(all_uuids), DELETE_CHUNK):
+        db.execute(delete_record_query, {"uuids": all_uuids[start:start + DELETE_CHUNK]})
 
+    return {rectype: len(uuids) for rectype, uuids in by_rectype.items()}
@@ -0,0 +1,159 @@
+import os
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from ..db.db import get_db
+from clio.db.ops import fetch_embeddings
+from clio.utils.log_util import log_message
+from clio.utils.embedding_index import embedding_index
+from clio.utils.queries import fetch_subtree
+from .record import delete_records
+from .metadata import metadata
+from .cache import content_cache
+
+##############################################################################################
+################################ SOFT DELETE AND BATCHED PURGE ###############################
+##############################################################################################
+
+# Deleting only sets `trashed_at` on the subtree root (a record or a genus), which hides the
+# whole subtree from the tree and from search. Purging removes the rows later, in batches.
+
+TRASH_RETENTION_DAYS = float(os.getenv("CLIO_TRASH_DAYS", "30"))  # The TUI purges older trash at startup
+PURGE_BATCH_SIZE = 500  # Records deleted per transaction
+
+# Trashing is no content change: keep `record.modify_date` from firing ON UPDATE (genus has none)
+KEEP_MODIFY_DATE = {"record": ", modify_date = modify_date", "genus": ""}
+
+
+def trash(uuid: str) -> str | None:
+    """Move a record or genus with its subtree to the trash. Returns "record", "genus", or None if not found."""
+    with next(get_db()) as db:
+        kind = None
+        for table in ("record", "genus"):
+            result = db.execute(
+                text(f"UPDATE {table} SET trashed_at = NOW(){KEEP_MODIFY_DATE[table]} WHERE UUID = :uuid AND trashed_at IS NULL"),
+                {"uuid": uuid}
+            )
+            if result.rowcount:
+                kind = table
+                break
+        db.commit()
+
+        if kind is None:
+            return None
+        if kind == "genus":
+            metadata.invalidate("genus")
+        hidden = [row["UUID"] for row in fetch_subtree(db, uuid)] + [uuid]
+
+    embedding_index.remove(hidden)
+    content_cache.invalidate(*hidden)
+    log_message(f"🗑 Moved {kind} {uuid} and {len(hidden) - 1} descendants to the trash.", "info")
+    return kind
+
+
+def restore(uuid: str) -> str | None:
+    """Take a record or genus out of the trash. Returns "record", "genus", or None if it was not trashed."""
+    with next(get_db()) as db:
+        kind = None
+        for table in ("record", "genus"):
+            result = db.execute(
+                text(f"UPDATE {table} SET trashed_at = NULL{KEEP_MODIFY_DATE[table]} WHERE UUID = :uuid AND trashed_at IS NOT NULL"),
+                {"uuid": uuid}
+            )
+            if result.rowcount:
+                kind = table
+                break
+        db.commit()
+
+        if kind is None:
+            return None
+        if kind == "genus":
+            metadata.invalidate("genus")
+        restored = [row["UUID"] for row in fetch_subtree(db, uuid)] + [uuid]
+
+    # ✅ Put the embeddings back into the search index of this process
+    if embedding_index.loaded:
+        for rec_UUID, vector, _ in fetch_embeddings(embedding_index.model, uuids=restored):
+            embedding_index.upsert(rec_UUID, vector)
+
+    log_message(f"♻ Restored {kind} {uuid} with {len(restored) - 1} descendants.", "info")
+    return kind
+
+
+def list_trash() -> list[dict]:
+    """Trashed records and genera (subtree roots only), newest first."""
+    with next(get_db()) as db:
+        return db.execute(text("""
+            SELECT UUID, name, 'record' AS kind, trashed_at FROM record WHERE trashed_at IS NOT NULL
+            UNION ALL
+            SELECT UUID, name, 'genus' AS kind, trashed_at FROM genus WHERE trashed_at IS NOT NULL
+            ORDER BY trashed_at DESC
+        """)).mappings().all()
+
+
+def is_trashed(db, root) -> bool:
+    table = "genus" if root["kind"] == "genus" else "record"
+    return bool(db.execute(
+        text(f"SELECT COUNT(*) FROM {table} WHERE UUID = :uuid AND trashed_at IS NOT NULL"), {"uuid": root["UUID"]}
+    ).scalar())
+
+
+def purge_subtree(root, batch_size: int) -> int | None:
+    """Delete everything below a trashed root, deepest first. Returns None if the root was restored meanwhile."""
+    purged = 0
+    while True:
+        with next(get_db()) as db:
+            rows = sorted(fetch_subtree(db, root["UUID"]), key=lambda row: row["depth"], reverse=True)
+        if not rows:
+            return purged
+
+        for start in range(0, len(rows), batch_size):
+            with next(get_db()) as db:
+                if not is_trashed(db, root):
+                    return None
+                delete_records(db, rows[start:start + batch_size])
+                db.commit()
+            purged += len(rows[start:start + batch_size])
+
+
+def purge_trash(older_than: timedelta | None = None, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """Permanently delete trashed subtrees (only those trashed before `older_than` ago, if given).
+
+    Each batch of at most `batch_size` records is its own transaction, deepest records first,
+    so an interrupted purge leaves a consistent (still trashed) subtree and resumes on the next run.
+    Returns the number of records deleted.
+    """
+    cutoff = datetime.now() - older_than if older_than is not None else None
+    purged = 0
+
+    for root in list_trash():
+        if cutoff is not None and root["trashed_at"] > cutoff:
+            continue
+
+        count = purge_subtree(root, batch_size)
+        if count is None:
+            log_message(f"⚠ {root['kind']} {root['UUID']} was restored during the purge.", "warning")
+            continue
+        purged += count
+
+        # Finally the root itself, unless it was restored in the meantime
+        with next(get_db()) as db:
+            if root["kind"] == "genus":
+                db.execute(text("DELETE FROM genus WHERE UUID = :uuid AND trashed_at IS NOT NULL"), {"uuid": root["UUID"]})
+            else:
+                rectype = db.execute(text("""
+                    SELECT rectype.name FROM record JOIN rectype ON record.rectype_id = rectype.id
+                    WHERE record.UUID = :uuid AND record.trashed_at IS NOT NULL
+                """), {"uuid": root["UUID"]}).scalar()
+                if rectype:
+                    delete_records(db, [{"UUID": root["UUID"], "rectype": rectype}])
+                    purged += 1
+            db.commit()
+
+        log_message(f"Purged {root['kind']} {root['UUID']} from the trash.", "info")
+
+    return purged
+
+
+def purge_expired_trash() -> int:
+    """Purge trash older than `CLIO_TRASH_DAYS`; run in a background worker by the TUI."""
+    return purge_trash(older_than=timedelta(days=TRASH_RETENTION_DAYS))
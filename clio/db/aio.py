@@ -0,0 +1,108 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from . import ops
+from .db import unit_of_work
+from clio.core.metadata import metadata
+from clio.core.content import compiled_rectype
+from clio.utils import queries
+
+##############################################################################################
+################################ AWAITABLE DATABASE ACCESS ###################################
+##############################################################################################
+
+# The TUI must not run PyMySQL calls on the asyncio loop: rendering and input stop until the
+# query returns. `run_db` runs the existing synchronous functions on a small thread pool of
+# their own (each call gets its own pooled session) and returns an awaitable, so widgets
+# `await` their data while the loop keeps drawing. Writes of a user action go through
+# `run_unit_of_work`, which also shares one connection between their queries.
+# Tree and relation fetches also load the rectype metadata (with column types) on that thread,
+# so `metadata.rectype()` and `compiled_rectype()` on the loop only hit the cache.
+
+DB_THREADS = int(os.getenv("CLIO_DB_THREADS", "4"))  # Concurrent queries; at most the pool size
+
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="clio-db")
+
+
+async def run_db(func, *args, **kwargs):
+    """Run a blocking database function on the DB threads and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(func, *args, **kwargs))
+
+
+async def run_unit_of_work(name: str, func, *args, **kwargs):
+    """Run `func` inside `unit_of_work(name)` on the DB threads; units of work are bound to their thread."""
+    def work():
+        with unit_of_work(name):
+            return func(*args, **kwargs)
+    return await run_db(work)
+
+
+def warm_metadata(rectype_ids=()):
+    """Load rectypes and their column types on the DB thread, so lookups on the loop hit the cache."""
+    for rectype_id in rectype_ids:
+        metadata.rectype(rectype_id)  # Reloads when a rectype was added since the last load
+    for name in metadata.rectype_names():
+        compiled_rectype(name)
+
+
+def with_metadata(func, *args, key: str = "rectype_id"):
+    """Run `func` and resolve the rectypes of the rows it returns (genera have none), both on the same DB thread."""
+    rows = func(*args)
+    records = rows["records"] if isinstance(rows, dict) else rows
+    warm_metadata({row[key] for row in records if key in row})
+    return rows
+
+
+def shutdown():
+    """Drop queued queries on exit; running ones finish on their own."""
+    db_executor.shutdown(wait=False, cancel_futures=True)
+
+
+########### TREE ###########
+
+async def fetch_tree_data() -> dict:
+    return await run_db(with_metadata, ops.fetch_tree_data)
+
+
+async def fetch_genera() -> list:
+    return await run_db(with_metadata, ops.fetch_genera)  # Warms the rectypes before the first expand
+
+
+async def fetch_children(parent_UUID: str) -> list:
+    return await run_db(with_metadata, ops.fetch_children, parent_UUID)
+
+
+async def fetch_children_of(parent_UUIDs: list[str]) -> list:
+    return await run_db(with_metadata, ops.fetch_children_of, parent_UUIDs)
+
+
+async def subtree_stats(uuid: str) -> dict:
+    """Descendant counts per rectype and depth below a record or genus; see `queries.subtree_stats`."""
+    return await run_db(queries.subtree_stats, uuid)
+
+
+########### CONTENT AND RELATIONS ###########
+
+async def load_preview(record_UUID: str, rectype: str):
+    """`(content, markdown)` of a record, or None; see `ops.load_preview`."""
+    return await run_db(ops.load_preview, record_UUID, rectype)
+
+
+async def fetch_relations_for_record(uuid: str) -> list[dict]:
+    return await run_db(with_metadata, ops.fetch_relations_for_record, uuid, key="target_rectype_id")
+
+
+########### METADATA ###########
+
+async def rectype_names() -> list[str]:
+    return await run_db(metadata.rectype_names)
+
+
+async def reltypes() -> list[dict]:
+    return await run_db(metadata.reltypes)
+
+
+async def genus_types() -> list[dict]:
+    return await run_db(metadata.genus_types)
@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.orm import sessionmaker, Session
+from contextlib import contextmanager
+from contextvars import ContextVar
 import os
+import threading
+import time
 
 # Load DB connection string from environment variable or use a default fallback
 DB_URL = os.getenv("CLIO_DB_URL")
@@ -9,18 +13,159 @@ DB_URL = os.getenv("CLIO_DB_URL")
 if DB_URL.startswith("mysql://"):
     DB_URL = DB_URL.replace("mysql://", "mysql+pymysql://", 1)
 
-# Create the database engine
-engine = create_engine(DB_URL, echo=False, pool_pre_ping=True)
+# Pool tuning
+POOL_SIZE = int(os.getenv("CLIO_DB_POOL_SIZE", "5"))          # Connections kept open
+MAX_OVERFLOW = int(os.getenv("CLIO_DB_MAX_OVERFLOW", "10"))   # Extra connections under load
+POOL_RECYCLE = int(os.getenv("CLIO_DB_POOL_RECYCLE", "1800"))  # Replace connections older than this (s), below wait_timeout
+PING_AFTER = float(os.getenv("CLIO_DB_PING_AFTER", "300"))    # Ping only connections idle longer than this (s)
+
+# Create the database engine; instead of `pool_pre_ping` (a round trip on every checkout),
+# only connections that sat idle in the pool for a while are pinged
+engine = create_engine(DB_URL, echo=False, pool_size=POOL_SIZE, max_overflow=MAX_OVERFLOW, pool_recycle=POOL_RECYCLE)
+
+
+##############################################################################################
+################################# COUNTERS AND LAZY PING #####################################
+
+class DBStats:
+    """Checkouts, statements (round trips) and commits, for the process or for one unit of work."""
+
+    __slots__ = ("checkouts", "statements", "commits")
+
+    def __init__(self):
+        self.checkouts = 0
+        self.statements = 0
+        self.commits = 0
+
+    def __repr__(self):
+        return f"{self.checkouts} checkouts, {self.statements} statements, {self.commits} commits"
+
+
+db_stats = DBStats()  # Whole process
+_stats_lock = threading.Lock()
+_current_uow: ContextVar["UnitOfWork | None"] = ContextVar("clio_unit_of_work", default=None)
+
+
+def count(field: str):
+    with _stats_lock:
+        setattr(db_stats, field, getattr(db_stats, field) + 1)
+    uow = current_unit_of_work()
+    if uow is not None:
+        setattr(uow.stats, field, getattr(uow.stats, field) + 1)
+
+
+@event.listens_for(engine, "checkin")
+def on_checkin(dbapi_connection, connection_record):
+    connection_record.info["checked_in"] = time.monotonic()
+
+
+@event.listens_for(engine, "checkout")
+def on_checkout(dbapi_connection, connection_record, connection_proxy):
+    count("checkouts")
+    idle = time.monotonic() - connection_record.info.get("checked_in", time.monotonic())
+    if idle < PING_AFTER:
+        return
+    try:
+        cursor = dbapi_connection.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        count("statements")
+    except Exception:
+        raise exc.DisconnectionError()  # The pool retries with a new connection
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def on_execute(conn, cursor, statement, parameters, context, executemany):
+    count("statements")
+
+
+@event.listens_for(engine, "commit")
+def on_commit(conn):
+    count("commits")
+
+
+##############################################################################################
+##################################### SESSIONS ###############################################
+
+# There is no separate repository layer: the query functions in `ops`, `record`, `genus` etc. keep
+# taking their session from `get_db()`, and `unit_of_work()` makes them share one per user action.
 
 # Create a session factory for database interactions
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+class SharedSession(Session):
+    """Session of a unit of work: `with next(get_db())` blocks inside it leave it open.
+
+    Leaving a block still rolls back what it did not commit, as closing a session would, so a
+    block that fails halfway cannot have its statements committed by the next one.
+    """
+
+    def close(self):
+        if self.in_transaction():
+            self.rollback()
+
+    def close_unit_of_work(self):
+        super().close()
+
+
+class UnitOfWork:
+    def __init__(self, name: str, session: SharedSession):
+        self.name = name
+        self.session = session
+        self.stats = DBStats()
+        self.thread = threading.get_ident()
+        self.active = True
+
+    def usable(self) -> bool:
+        """Tasks copy the context they start in: only the owning thread, and only until the end."""
+        return self.active and self.thread == threading.get_ident()
+
+
+def current_unit_of_work() -> UnitOfWork | None:
+    uow = _current_uow.get()
+    return uow if uow is not None and uow.usable() else None
+
+
+@contextmanager
+def unit_of_work(name: str = "action"):
+    """Share one connection and session between every `get_db()` of a user action.
+
+    Commits inside still commit; the connection is checked out once and returned at the end.
+    Nested units of work join the outer one. Yields the `UnitOfWork` (see `stats`).
+    """
+    outer = current_unit_of_work()
+    if outer is not None:
+        yield outer
+        return
+
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        uow = UnitOfWork(name, SharedSession(bind=connection, autoflush=False))
+        uow.stats.checkouts = 1  # Counted globally before the unit of work was current
+        token = _current_uow.set(uow)
+        try:
+            yield uow
+        finally:
+            uow.active = False
+            _current_uow.reset(token)
+            uow.session.close_unit_of_work()
+
+    # Imported here: the log widget module imports the UI, which imports this module
+    from clio.utils.log_util import log_message
+    log_message(f"[DB] {name}: {uow.stats} in {(time.perf_counter() - started) * 1000:.0f} ms", "debug")
+
+
 # Dependency function for getting a database session
 def get_db():
-    """Yield a new database session and ensure it closes properly."""
+    """Yield the session of the current unit of work, or a new database session that closes properly."""
+    uow = current_unit_of_work()
+    if uow is not None:
+        yield uow.session
+        return
+
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
-
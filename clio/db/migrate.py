@@ -0,0 +1,270 @@
+import json
+from sqlalchemy import text
+from .db import get_db
+from .vectors import encode_vector
+
+##############################################################################################
+##################################### SCHEMA CHANGE STEPS ####################################
+##############################################################################################
+
+
+def ensure_embedding_columns(db) -> bool:
+    """Add the `vector`/`dim`, `content_hash` and `modify_date` columns to `embeddings` if missing. Returns True if altered."""
+    existing = db.execute(text("""
+        SELECT COLUMN_NAME FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'embeddings'
+    """)).scalars().all()
+
+    alterations = []
+    if "vector" not in existing:
+        alterations += [
+            "MODIFY `embedding` longtext DEFAULT NULL CHECK (json_valid(`embedding`))",  # NULL passes the CHECK
+            "ADD COLUMN `vector` blob DEFAULT NULL AFTER `embedding`",
+            "ADD COLUMN `dim` smallint(5) unsigned DEFAULT NULL AFTER `vector`",
+        ]
+    if "content_hash" not in existing:
+        alterations.append("ADD COLUMN `content_hash` char(64) DEFAULT NULL AFTER `dim`")
+    if "modify_date" not in existing:
+        alterations.append("ADD COLUMN `modify_date` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp()")
+
+    if not alterations:
+        return False
+
+    db.execute(text(f"ALTER TABLE embeddings {', '.join(alterations)}"))
+    db.commit()
+    return True
+
+
+def ensure_job_table(db) -> bool:
+    """Create the `job` queue table used by `clio worker` if missing. Returns True if created."""
+    exists = db.execute(text("""
+        SELECT COUNT(*) FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'job'
+    """)).scalar()
+    if exists:
+        return False
+
+    db.execute(text("""
+        CREATE TABLE `job` (
+          `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+          `kind` varchar(32) NOT NULL,
+          `rec_UUID` char(36) NOT NULL,
+          `status` enum('pending','running','failed') NOT NULL DEFAULT 'pending',
+          `attempts` smallint(5) unsigned NOT NULL DEFAULT 0,
+          `run_after` datetime NOT NULL DEFAULT current_timestamp(),
+          `locked_by` char(32) DEFAULT NULL,
+          `locked_until` datetime DEFAULT NULL,
+          `last_error` text DEFAULT NULL,
+          `create_date` datetime NOT NULL DEFAULT current_timestamp(),
+          PRIMARY KEY (`id`),
+          UNIQUE KEY `kind_record` (`kind`,`rec_UUID`),
+          KEY `due` (`kind`,`status`,`run_after`),
+          KEY `rec_UUID` (`rec_UUID`),
+          CONSTRAINT `job_ibfk_1` FOREIGN KEY (`rec_UUID`) REFERENCES `record` (`UUID`) ON DELETE CASCADE
+        ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci
+    """))
+    db.commit()
+    return True
+
+
+def ensure_trash_columns(db) -> bool:
+    """Add the soft-delete `trashed_at` column to `record` and `genus` if missing. Returns True if altered."""
+    altered = False
+    for table in ("record", "genus"):
+        exists = db.execute(text("""
+            SELECT COUNT(*) FROM information_schema.COLUMNS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND COLUMN_NAME = 'trashed_at'
+        """), {"table": table}).scalar()
+        if not exists:
+            db.execute(text(f"ALTER TABLE `{table}` ADD COLUMN `trashed_at` datetime DEFAULT NULL, ADD KEY `trashed_at` (`trashed_at`)"))
+            altered = True
+    db.commit()
+    return altered
+
+
+def index_exists(db, table: str, index: str) -> bool:
+    return bool(db.execute(text("""
+        SELECT COUNT(*) FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND INDEX_NAME = :index
+    """), {"table": table, "index": index}).scalar())
+
+
+def ensure_indexes(db, table: str, indexes: dict[str, str]) -> bool:
+    """Add the missing `name -> column list` keys to `table` with one ALTER. Returns True if altered."""
+    missing = [f"ADD KEY `{name}` ({columns})" for name, columns in indexes.items() if not index_exists(db, table, name)]
+    if not missing:
+        return False
+    db.execute(text(f"ALTER TABLE `{table}` {', '.join(missing)}"))
+    db.commit()
+    return True
+
+
+def ensure_tree_indexes(db) -> bool:
+    """Index `record.parent_UUID`, which the lazy tree and the recursive subtree queries look up. Returns True if created."""
+    return ensure_indexes(db, "record", {"parent_UUID": "`parent_UUID`, `trashed_at`"})
+
+
+def ensure_relation_tables(db) -> bool:
+    """Create `reltype` and `relations` where the schema was imported without them. Returns True if created."""
+    existing = db.execute(text("""
+        SELECT TABLE_NAME FROM information_schema.TABLES
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ('reltype', 'relations')
+    """)).scalars().all()
+
+    if "reltype" not in existing:
+        db.execute(text("""
+            CREATE TABLE `reltype` (
+              `id` int(11) NOT NULL AUTO_INCREMENT,
+              `name` varchar(100) NOT NULL,
+              PRIMARY KEY (`id`),
+              UNIQUE KEY `name` (`name`)
+            ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci
+        """))
+    if "relations" not in existing:
+        db.execute(text("""
+            CREATE TABLE `relations` (
+              `UUID` char(36) NOT NULL,
+              `rec_UUID` char(36) NOT NULL,
+              `rel_rec_UUID` char(36) NOT NULL,
+              `reltype_id` int(11) NOT NULL,
+              `description` varchar(255) DEFAULT NULL,
+              PRIMARY KEY (`UUID`),
+              KEY `rec_reltype` (`rec_UUID`,`reltype_id`),
+              KEY `rel_rec_reltype` (`rel_rec_UUID`,`reltype_id`),
+              KEY `reltype_id` (`reltype_id`),
+              CONSTRAINT `relations_ibfk_1` FOREIGN KEY (`rec_UUID`) REFERENCES `record` (`UUID`) ON DELETE CASCADE,
+              CONSTRAINT `relations_ibfk_2` FOREIGN KEY (`rel_rec_UUID`) REFERENCES `record` (`UUID`) ON DELETE CASCADE,
+              CONSTRAINT `relations_ibfk_3` FOREIGN KEY (`reltype_id`) REFERENCES `reltype` (`id`)
+            ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci
+        """))
+    db.commit()
+    return len(existing) < 2
+
+
+def ensure_query_indexes(db) -> bool:
+    """Secondary indexes for the hot lookups: records by rectype and change date, relations of a record."""
+    altered = ensure_indexes(db, "record", {"rectype_id": "`rectype_id`", "modify_date": "`modify_date`"})
+    altered |= ensure_indexes(db, "relations", {
+        "rec_reltype": "`rec_UUID`, `reltype_id`",        # fetch_relations_for_record, outgoing
+        "rel_rec_reltype": "`rel_rec_UUID`, `reltype_id`",  # fetch_relations_for_record, incoming
+    })
+    return altered
+
+
+##############################################################################################
+################################ VERSIONED SCHEMA MIGRATIONS #################################
+##############################################################################################
+
+# Applied versions are recorded in `schema_version`. Every step is idempotent, since MariaDB
+# commits DDL at once: a run that fails between a step and its version row just repeats it.
+# New steps are appended with the next number; never renumber or remove one.
+
+MIGRATIONS = [
+    (1, "embedding columns", ensure_embedding_columns),
+    (2, "job table", ensure_job_table),
+    (3, "trash columns", ensure_trash_columns),
+    (4, "tree indexes", ensure_tree_indexes),
+    (5, "relation tables", ensure_relation_tables),
+    (6, "query indexes", ensure_query_indexes),
+]
+
+
+def ensure_version_table(db):
+    db.execute(text("""
+        CREATE TABLE IF NOT EXISTS `schema_version` (
+          `version` int(11) NOT NULL,
+          `name` varchar(100) NOT NULL,
+          `applied_at` datetime NOT NULL DEFAULT current_timestamp(),
+          PRIMARY KEY (`version`)
+        ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci
+    """))
+    db.commit()
+
+
+def applied_versions(db) -> set[int]:
+    ensure_version_table(db)
+    return set(db.execute(text("SELECT version FROM schema_version")).scalars().all())
+
+
+def schema_version() -> int:
+    """Highest applied migration, 0 for a database that was never migrated."""
+    with next(get_db()) as db:
+        return max(applied_versions(db), default=0)
+
+
+def pending_migrations() -> list[tuple[int, str]]:
+    with next(get_db()) as db:
+        applied = applied_versions(db)
+    return [(version, name) for version, name, _ in MIGRATIONS if version not in applied]
+
+
+def migrate(target: int | None = None) -> list[tuple[int, str]]:
+    """Apply the pending migrations up to `target` (default: all) in order. Returns those applied."""
+    applied_now = []
+    with next(get_db()) as db:
+        applied = applied_versions(db)
+        for version, name, step in MIGRATIONS:
+            if version in applied or (target is not None and version > target):
+                continue
+            step(db)
+            # IGNORE: two processes starting at once may both apply the same idempotent step
+            db.execute(text("INSERT IGNORE INTO schema_version (version, name) VALUES (:version, :name)"),
+                       {"version": version, "name": name})
+            db.commit()
+            applied_now.append((version, name))
+    return applied_now
+
+
+def upgrade_schema() -> list[str]:
+    """Apply all pending migrations at startup (TUI and CLI commands). Returns the names applied."""
+    return [name for _, name in migrate()]
+
+
+##############################################################################################
+######################## JSON -> BINARY FLOAT32 EMBEDDING MIGRATION ##########################
+##############################################################################################
+
+
+def migrate_embeddings(batch_size: int = 500, keep_json: bool = False) -> int:
+    """Convert JSON embeddings to float32 blobs in batches. Returns the number of rows converted."""
+    converted = 0
+    last_uuid = ""
+
+    with next(get_db()) as db:
+        if ensure_embedding_columns(db):
+            print("Added missing columns to `embeddings`.")
+
+        update_query = text(f"""
+            UPDATE embeddings
+            SET vector = :vector, dim = :dim{"" if keep_json else ", embedding = NULL"}
+            WHERE rec_UUID = :rec_UUID
+        """)
+
+        while True:
+            rows = db.execute(text("""
+                SELECT rec_UUID, embedding FROM embeddings
+                WHERE vector IS NULL AND embedding IS NOT NULL AND rec_UUID > :last_uuid
+                ORDER BY rec_UUID
+                LIMIT :batch_size
+            """), {"last_uuid": last_uuid, "batch_size": batch_size}).fetchall()
+
+            if not rows:
+                break
+            last_uuid = rows[-1][0]
+
+            params = []
+            for rec_UUID, embedding in rows:
+                try:
+                    values = json.loads(embedding)
+                except json.JSONDecodeError:
+                    print(f"Skipped {rec_UUID}: embedding is not valid JSON.")
+                    continue
+                params.append({"rec_UUID": rec_UUID, "vector": encode_vector(values), "dim": len(values)})
+
+            if params:
+                db.execute(update_query, params)
+                db.commit()
+                converted += len(params)
+            print(f"Converted {converted} embeddings...")
+
+    return converted
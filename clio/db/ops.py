@@ -1,13 +1,19 @@
 from typing import NamedTuple, Optional
 from .db import get_db
-from typing import Dict, Any
-import json
-from openai import OpenAI
 from clio.core.state import app_state
+from clio.core.content import compiled_rectype, load_content
+from clio.core.cache import content_cache
+from clio.utils.markdown_utils import build_markdown
 from clio.utils.log_util import log_message
-from sqlalchemy import text
+from clio.utils.embedding_index import embedding_index, EMBEDDING_MODEL
+from clio.utils.embeddings import embedding_text, embed_texts, content_hash
+from .vectors import encode_vector, decode_row
+from sqlalchemy import text, bindparam
+from clio.utils.queries import fetch_trashed_uuids
 from uuid import uuid4
+from datetime import datetime
 import uuid
+import time
 
 ##############################################################################################
 ################################ UPDATE RECORD TITLE IN DB ###################################
@@ -41,125 +47,104 @@ def fetch_tree_data():
             # ✅ Fetch genus entries
             genus_query = """
                 SELECT UUID, name, description, genus_type_id
-                FROM genus;
+                FROM genus
+                WHERE trashed_at IS NULL;
             """
             genus_result = db.execute(text(genus_query)).mappings().all()
 
-            # ✅ Fetch records along with `rectype.icon`
+            # ✅ Fetch records; rectype metadata comes from the shared registry (`clio.core.metadata`)
             record_query = """
-                SELECT record.UUID, record.parent_UUID, record.name, record.rectype_id, 
-                       rectype.name AS rectype, rectype.icon as icon, rectype.content_schema, 
-                       rectype.content_caption, rectype.content_render_class
+                SELECT record.UUID, record.parent_UUID, record.name, record.rectype_id
                 FROM record
-                JOIN rectype ON record.rectype_id = rectype.id;
+                WHERE record.trashed_at IS NULL;  -- Children of trashed records are unreachable from the roots
+
             """
             record_result = db.execute(text(record_query)).mappings().all()
 
         return {"genera": genus_result, "records": record_result}
 
-##############################################################################################
-#### FETCH CONTENT FROM DB AND STORE IN APP_STATE VARIABLES (SCHEMA and CONTENT are DICT) ####
-##############################################################################################
-##############################################################################################
-
-def create_dynamic_class(schema: Dict[str, Any]):
-    """Create a dynamic class based on the schema and include necessary fields like rectype, name, etc."""
-    
-    # Define the class attributes based on the schema's "header" and other fields
-    attributes = {field: None for field in schema.get("header", [])}
-    
-    # Add other essential fields (rectype, name, content) to the dynamic class
-    attributes["rectype"] = None
-    attributes["name"] = None
-    attributes["content"] = None  # Default content field
-    
-    # Create the dynamic class using type()
-    return type("DynamicContent", (object,), attributes)
-
-###############################################################################################
-def fetch_content(record_UUID: str):
-    """Fetch content and dynamically create an object using the current schema."""
-
-    # ✅ Ensure `app_state.current_schema` is always a dictionary
-    if isinstance(app_state.current_schema, str):
-        try:
-            parsed_schema = json.loads(app_state.current_schema)
-            app_state.current_schema = parsed_schema  # Store as dict
-            log_message("✅ Converted `app_state.current_schema` from string to dictionary", "info")
-        except json.JSONDecodeError:
-            log_message(f"❌ Error parsing `app_state.current_schema`: {app_state.current_schema}", "error")
-            return
-
-    schema = app_state.current_schema  # ✅ Now guaranteed to be a dictionary
-    rectype = app_state.current_rectype
-
-    if not schema or not rectype:
-        log_message("Missing schema or rectype in app_state", "error")
-        return
-
-    # Create a dynamic class using the schema
-    ContentClass = create_dynamic_class(schema)
-    content_instance = ContentClass()
+############################## LAZY TREE: ONE LEVEL PER QUERY ##############################
 
-    # ✅ Fetch header fields
-    header_columns = schema.get("header", [])
-    if isinstance(header_columns, str):
-        header_columns = [header_columns]  # Convert single field to list if necessary
+def fetch_genera():
+    """Genus entries with a `child_count` aggregate, so expand arrows are right before loading children."""
+    with next(get_db()) as db:
+        return db.execute(text("""
+            SELECT genus.UUID, genus.name, genus.description, genus.genus_type_id,
+                   (SELECT COUNT(*) FROM record
+                    WHERE record.parent_UUID = genus.UUID AND record.trashed_at IS NULL) AS child_count
+            FROM genus
+            WHERE genus.trashed_at IS NULL
+        """)).mappings().all()
 
-    content_columns = schema.get("content", ["content"])  # Allow multiple content fields in future
-    if isinstance(content_columns, str):
-        content_columns = [content_columns]
 
-    columns_to_fetch = ", ".join(header_columns + content_columns)
+def fetch_children(parent_UUID: str):
+    """Direct children of a genus or record (indexed on `parent_UUID`), each with its own `child_count`."""
+    return fetch_children_of([parent_UUID])
 
-    content_query = f"""
-        SELECT {columns_to_fetch}
-        FROM {rectype}
-        WHERE rec_UUID = :record_UUID
-    """
 
+def fetch_children_of(parent_UUIDs):
+    """Direct children of several genera or records in one query, e.g. every loaded level of the tree."""
+    parent_UUIDs = list(parent_UUIDs)
+    if not parent_UUIDs:
+        return []
     with next(get_db()) as db:
-        content_result = db.execute(text(content_query), {"record_UUID": record_UUID}).mappings().first()
+        return db.execute(text("""
+            SELECT record.UUID, record.parent_UUID, record.name, record.rectype_id,
+                   (SELECT COUNT(*) FROM record child
+                    WHERE child.parent_UUID = record.UUID AND child.trashed_at IS NULL) AS child_count
+            FROM record
+            WHERE record.parent_UUID IN :parent_UUIDs AND record.trashed_at IS NULL
+        """).bindparams(bindparam("parent_UUIDs", expanding=True)), {"parent_UUIDs": parent_UUIDs}).mappings().all()
 
-        if not content_result:
-            log_message(f"No content found for {record_UUID}", "warning")
-            return
 
-        # Store fields inside dictionary
-        header_data = {key: content_result.get(key, "N/A") for key in header_columns}
-        content_data = {key: content_result.get(key, "") for key in content_columns}
-
-        # Fetch and store appendix items
-        appendix = schema.get("appendix", [])
-        appendix_data = {}
+##############################################################################################
+#### FETCH CONTENT FROM DB AND STORE IN APP_STATE VARIABLES (SCHEMA and CONTENT are DICT) ####
+##############################################################################################
+##############################################################################################
 
-        if appendix:
-            for item in appendix:
-                if item == "note":
-                    notes_query = "SELECT note FROM rec_note WHERE rec_UUID = :record_UUID"
-                    notes = db.execute(text(notes_query), {"record_UUID": record_UUID}).mappings().all()
-                    appendix_data["notes"] = [note["note"] for note in notes] if notes else []
+def load_preview(record_UUID: str, rectype: str):
+    """`(content, markdown)` of a record from the content cache or one query; safe in worker threads."""
+    cached = content_cache.get(record_UUID)
+    if cached is not None and cached.markdown is not None:
+        return cached.content, cached.markdown
+
+    compiled = compiled_rectype(rectype)
+    if not compiled:
+        log_message(f"Unknown rectype `{rectype}` for {record_UUID}", "error")
+        return None
+
+    # ✅ Content and appendices in one round trip
+    version = content_cache.version(record_UUID)
+    if cached is not None:
+        content_instance = cached.content
+    else:
+        with next(get_db()) as db:
+            content_instance = load_content(db, record_UUID, rectype)
+        if not content_instance:
+            return None
 
-                elif item == "source":
-                    sources_query = "SELECT name, author, year FROM rec_source WHERE rec_UUID = :record_UUID"
-                    sources = db.execute(text(sources_query), {"record_UUID": record_UUID}).mappings().all()
-                    appendix_data["sources"] = [{"name": s["name"], "author": s["author"], "year": s["year"]} for s in sources] if sources else []
+    markdown = build_markdown(content_instance, rectype, compiled.info.content_caption or "Content")
+    content_cache.put(record_UUID, content_instance, markdown, version=version)
+    return content_instance, markdown
 
-                elif item == "url":
-                    urls_query = "SELECT title, url FROM rec_url WHERE rec_UUID = :record_UUID"
-                    urls = db.execute(text(urls_query), {"record_UUID": record_UUID}).mappings().all()
-                    appendix_data["urls"] = [{"title": u["title"], "url": u["url"]} for u in urls] if urls else []
 
-        # ✅ Store final structured object in `app_state`
-        setattr(content_instance, "header", header_data)
-        setattr(content_instance, "content", content_data)
-        setattr(content_instance, "appendix", appendix_data)
+def fetch_content(record_UUID: str):
+    """Fetch content into the compiled content class of `app_state.current_rectype`."""
+    rectype = app_state.current_rectype
+    if not rectype:
+        log_message("Missing schema or rectype in app_state", "error")
+        return
 
-        app_state.current_content = content_instance
-        app_state.current_content_markdown = content_data.get("summary", "")  # Default to summary
+    preview = load_preview(record_UUID, rectype)
+    if not preview:
+        log_message(f"No content found for {record_UUID}", "warning")
+        return
 
-        log_message(f"✅ Content fetched and stored for {record_UUID}: {vars(content_instance)}", "info")
+    content_instance, markdown = preview
+    app_state.current_content = content_instance
+    app_state.current_content_markdown = markdown
 
+    log_message(f"✅ Content fetched and stored for {record_UUID}: {content_instance.as_dict()}", "info")
     return content_instance
 
 
@@ -168,13 +153,24 @@ def fetch_content(record_UUID: str):
 ##############################################################################################
 ##############################################################################################
 
+# Title (kept if unset) and modification date; explicit because ON UPDATE skips unchanged rows
+RECORD_SAVE_QUERY = text("UPDATE record SET name = COALESCE(:title, name), modify_date = NOW() WHERE UUID = :uuid")
+
+
 def save_record_to_db():
-    """Save the current content in `app_state.current_content` to the correct database table."""
-    
+    """Save `app_state.current_content` in one transaction: changed content columns, title and `modify_date`.
+
+    Only fields in `current_content.dirty` are written; without changes nothing is sent. The title
+    (`title` or `name` header) goes to `record.name` when it changed. The commit is the only one
+    of the save, so content and title cannot get out of sync.
+    """
+
     if not app_state.current_UUID:
         log_message("❌ Cannot save: No record selected.", "error")
         return False
 
+    started = time.perf_counter()
+
     # ✅ Use `next(get_db())` to correctly retrieve the session
     with next(get_db()) as session:
     
@@ -184,53 +180,35 @@ def save_record_to_db():
             log_message("❌ Cannot save: No rectype found in app_state.", "error")
             return False
 
-        # ✅ Get actual table columns from schema
-        schema = app_state.current_schema
-        if isinstance(schema, str):
-            schema = json.loads(schema)
-
-        # ✅ Ensure both `header` and `content` are lists before merging
-        header_fields = schema.get("header", [])
-        content_fields = schema.get("content", [])
-
-        if isinstance(header_fields, str):
-            header_fields = [header_fields]  # ✅ Convert single string to list
-        if isinstance(content_fields, str):
-            content_fields = [content_fields]  # ✅ Convert single string to list
-
-        table_columns = set(header_fields + content_fields)  # ✅ Now both are lists
+        compiled = compiled_rectype(table_name)
+        if not compiled:
+            log_message(f"❌ Cannot save: unknown rectype `{table_name}`.", "error")
+            return False
 
         # ✅ Extract structured content data
-        content_data = {}
-
-        # ✅ Flatten `header` and `content` fields
-        if hasattr(app_state.current_content, "header"):
-            content_data.update(app_state.current_content.header)
-        if hasattr(app_state.current_content, "content"):
-            content_data.update(app_state.current_content.content)
+        content = app_state.current_content
+        content_data = {**content.content, **content.header}
 
-        # ✅ Remove fields that are not in the schema (appendix excluded)
-        content_data = {k: v for k, v in content_data.items() if k in table_columns}
-
-        # ✅ Ensure we don't update UUID directly
-        if "rec_UUID" in content_data:
-            del content_data["rec_UUID"]
-
-        # ✅ Convert dictionary to column assignments
-        columns = ", ".join([f"{key} = :{key}" for key in content_data.keys()])
-        values = {**content_data, "record_UUID": app_state.current_UUID}  # Add UUID for WHERE clause
+        # ✅ Only the rectype's changed columns, in schema order (appendix and `rec_UUID` excluded)
+        columns = tuple(column for column in compiled.columns if column in content.dirty)
+        if not columns:
+            log_message(f"✅ No changes to save for {app_state.current_UUID}.", "info")
+            return True
 
-        # ✅ Construct the UPDATE query (explicitly wrap in text())
-        query = text(f"""
-        UPDATE {table_name}
-        SET {columns}
-        WHERE rec_UUID = :record_UUID
-        """)
+        values = {column: content_data[column] for column in columns}
+        values["record_UUID"] = app_state.current_UUID  # Add UUID for WHERE clause
+        query = compiled.update_statement(columns)  # ✅ Built once per changed-column set
+        title_field = "title" if "title" in content_data else "name"
+        title = (content_data.get(title_field) or None) if title_field in columns else None
 
         try:
             session.execute(query, values)  # ✅ Query is now correctly wrapped
-            session.commit()
-            log_message(f"✅ Successfully saved content to `{table_name}` for UUID: {app_state.current_UUID}", "info")
+            session.execute(RECORD_SAVE_QUERY, {"title": title, "uuid": app_state.current_UUID})
+            session.commit()  # ✅ The only commit of the save
+            content.mark_clean()
+            content_cache.invalidate(app_state.current_UUID)
+            log_message(f"✅ Successfully saved content to `{table_name}` for UUID: {app_state.current_UUID} "
+                        f"in {(time.perf_counter() - started) * 1000:.1f} ms", "info")
             return True
 
         except Exception as e:
@@ -303,6 +281,7 @@ def save_appendix_entry_to_db(appendix_type, data):
             log_message(f"✅ SQL Execution Result: {result.rowcount} row(s) affected", "info")
 
             db.commit()
+            content_cache.invalidate(app_state.current_UUID)
             log_message(f"✅ Commit successful for {appendix_type}.", "info")
             return True
 
@@ -325,6 +304,7 @@ def fetch_relations_for_record(uuid: str) -> list[dict]:
                 target.name AS target_name,
                 rt.name AS reltype_label,
                 r.description,
+                target.rectype_id AS target_rectype_id,
                 '→' AS direction
             FROM relations r
             JOIN record target ON r.rel_rec_UUID = target.uuid
@@ -338,6 +318,7 @@ def fetch_relations_for_record(uuid: str) -> list[dict]:
                 target.name AS target_name,
                 rt.name AS reltype_label,
                 r.description,
+                target.rectype_id AS target_rectype_id,
                 '←' AS direction
             FROM relations r
             JOIN record target ON r.rec_UUID = target.uuid
@@ -371,6 +352,7 @@ def delete_from_database(appendix_type: str, uuid: str):
             params = {"uuid": uuid}
             db.execute(query, params)
             db.commit()
+            content_cache.invalidate(app_state.current_UUID)  # Appendices belong to the current record
             log_message(f"✅ Deleted {appendix_type} with UUID {uuid} from database.", "info")
 
         except Exception as e:
@@ -382,46 +364,141 @@ def delete_from_database(appendix_type: str, uuid: str):
 #############################################################################################
 #############################################################################################
 
-def save_embeddings(record):
-    """Generate and store embeddings for a given record."""
+def upsert_embeddings(db, rows, model: str = EMBEDDING_MODEL):
+    """Insert or replace `(rec_UUID, vector, content_hash)` rows with one executemany; the caller commits."""
+    query = text("""
+        INSERT INTO embeddings (rec_UUID, vector, dim, embedding, content_hash, model)
+        VALUES (:record_UUID, :vector, :dim, NULL, :content_hash, :model)
+        ON DUPLICATE KEY UPDATE vector = :vector, dim = :dim, embedding = NULL,
+                                content_hash = :content_hash, model = :model, modify_date = NOW()
+    """)
+    params = [
+        {"record_UUID": rec_UUID, "vector": encode_vector(vector), "dim": len(vector),
+         "content_hash": text_hash, "model": model}
+        for rec_UUID, vector, text_hash in rows
+    ]
+    if params:
+        db.execute(query, params)
+
+
+def fetch_embedding_hash(record_UUID: str) -> tuple[str | None, str | None]:
+    """Return `(content_hash, model)` of a record's stored embedding, or `(None, None)`."""
+    with next(get_db()) as db:
+        row = db.execute(
+            text("SELECT content_hash, model FROM embeddings WHERE rec_UUID = :uuid"),
+            {"uuid": record_UUID}
+        ).fetchone()
+    return (row[0], row[1]) if row else (None, None)
+
 
-    if not app_state.current_UUID:
+def save_embeddings(record, record_UUID: str | None = None):
+    """Generate and store embeddings for a record (default: the current one), unless its content is unchanged."""
+
+    record_UUID = record_UUID or app_state.current_UUID
+    if not record_UUID:
         log_message("❌ Cannot save embeddings: No record selected.", "error")
         return
 
     # ✅ Ensure valid content
-    content_text = "\n".join(str(value) for value in record.content.values() if value)
+    content_text = embedding_text(record.content)
 
     if not content_text.strip():
-        log_message(f"⚠ Skipping embedding generation for {app_state.current_UUID}: Empty content", "warning")
+        log_message(f"⚠ Skipping embedding generation for {record_UUID}: Empty content", "warning")
         return
 
-    # ✅ Generate embedding
-    client = OpenAI()
-    response = client.embeddings.create(input=content_text, model="text-embedding-ada-002")
-    embedding_vector = response.data[0].embedding
+    # ✅ Skip the API round trip if this exact text was already embedded with this model
+    text_hash = content_hash(content_text)
+    if fetch_embedding_hash(record_UUID) == (text_hash, EMBEDDING_MODEL):
+        log_message(f"Embedding for {record_UUID} is up to date", "info")
+        return
 
-    # ✅ Convert to JSON
-    embedding_json = json.dumps(embedding_vector)
+    # ✅ Generate embedding
+    embedding_vector = embed_texts([content_text])[0]
 
     with next(get_db()) as db:
         try:
-            # ✅ Insert or Update embedding
-            query = text("""
-                INSERT INTO embeddings (rec_UUID, embedding, model)
-                VALUES (:record_UUID, :embedding, 'text-embedding-ada-002')
-                ON DUPLICATE KEY UPDATE embedding = :embedding, model = 'text-embedding-ada-002'
-            """)
-            params = {
-                "record_UUID": app_state.current_UUID,  # ✅ Corrected
-                "embedding": embedding_json
-            }
-
-            db.execute(query, params)
+            # ✅ Insert or Update embedding as little-endian float32 bytes
+            upsert_embeddings(db, [(record_UUID, embedding_vector, text_hash)])
             db.commit()
-            log_message(f"✅ Embedding stored for record {app_state.current_UUID}", "info")
+            embedding_index.upsert(record_UUID, embedding_vector)
+            log_message(f"✅ Embedding stored for record {record_UUID}", "info")
 
         except Exception as e:
             log_message(f"❌ Error storing embedding: {str(e)}", "error")
             db.rollback()
 
+
+def fetch_embeddings(model: str = EMBEDDING_MODEL, since: datetime | None = None, uuids=None):
+    """Return `(rec_UUID, vector, modify_date)` rows of `model`, optionally only those changed since `since` or of `uuids`."""
+    query = """
+        SELECT rec_UUID, vector, IF(vector IS NULL, embedding, NULL) AS embedding, modify_date
+        FROM embeddings
+        WHERE model = :model
+    """
+    if since is not None:
+        query += " AND modify_date >= :since"  # Inclusive: modify_date has one-second resolution
+    if uuids is not None:
+        query += " AND rec_UUID IN :uuids"
+    statement = text(query)
+    if uuids is not None:
+        statement = statement.bindparams(bindparam("uuids", expanding=True))
+        uuids = list(uuids)
+        if not uuids:
+            return []
+
+    with next(get_db()) as db:
+        # JSON is only transferred for rows not yet converted by `clio db migrate-embeddings`
+        rows = db.execute(statement, {"model": model, "since": since, "uuids": uuids}).fetchall()
+
+    return [(rec_UUID, decode_row(vector, embedding), modify_date) for rec_UUID, vector, embedding, modify_date in rows]
+
+
+def fetch_embedding_uuids(model: str = EMBEDDING_MODEL) -> set[str]:
+    """Return the UUIDs of all records that have an embedding of `model`."""
+    with next(get_db()) as db:
+        rows = db.execute(text("SELECT rec_UUID FROM embeddings WHERE model = :model"), {"model": model})
+        return {row[0] for row in rows}
+
+
+def load_embedding_index(index=embedding_index) -> int:
+    """Open the on-disk index cache and reconcile it with the `embeddings` table.
+
+    Only rows modified since the cached watermark are fetched; a full read happens only
+    when no usable cache exists. Records in the trash are left out so search skips them.
+    Returns the number of rows that were fetched.
+    """
+    watermark = index.open_cache()
+    with next(get_db()) as db:
+        trashed = fetch_trashed_uuids(db)
+
+    if watermark is None:
+        rows = [row for row in fetch_embeddings(index.model) if row[0] not in trashed]
+        index.load((rec_UUID, vector) for rec_UUID, vector, _ in rows)
+        changed = True
+    else:
+        since = datetime.fromisoformat(watermark)
+        rows = [row for row in fetch_embeddings(index.model, since=since) if row[0] not in trashed]
+        live = fetch_embedding_uuids(index.model) - trashed
+        stale = [uuid for uuid in index.uuids if uuid not in live]
+        if stale:
+            index.remove(stale)
+        for rec_UUID, vector, _ in rows:
+            index.upsert(rec_UUID, vector)
+        # Rows restored from the trash are live but older than the watermark
+        restored = fetch_embeddings(index.model, uuids=live - index.positions.keys())
+        for rec_UUID, vector, _ in restored:
+            index.upsert(rec_UUID, vector)
+        # Rows at exactly the watermark are re-read every time; only rewrite the cache on real changes
+        changed = bool(stale) or bool(restored) or any(modify_date and modify_date > since for _, _, modify_date in rows)
+
+    # Train the optional IVF lists here, in the startup worker, rather than on the first search
+    if index.prepare_ann():
+        changed = True
+
+    dates = [modify_date for _, _, modify_date in rows if modify_date is not None]
+    if dates:
+        watermark = max(dates).isoformat()
+    if changed:
+        index.save_cache(watermark)
+
+    return len(rows)
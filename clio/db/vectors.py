@@ -0,0 +1,25 @@
+import json
+import numpy as np
+
+# Embeddings are stored as little-endian float32 bytes in `embeddings.vector`
+VECTOR_DTYPE = np.dtype("<f4")
+
+
+def encode_vector(vector) -> bytes:
+    """Pack an embedding into the binary `embeddings.vector` format."""
+    return np.asarray(vector, dtype=VECTOR_DTYPE).tobytes()
+
+
+def decode_vector(blob: bytes, dim: int | None = None) -> np.ndarray:
+    """Read-only float32 view over a `vector` blob (no copy)."""
+    vector = np.frombuffer(blob, dtype=VECTOR_DTYPE)
+    if dim is not None and vector.shape[0] != dim:
+        raise ValueError(f"Embedding blob holds {vector.shape[0]} values, expected {dim}")
+    return vector
+
+
+def decode_row(vector: bytes | None, embedding: str | None) -> np.ndarray:
+    """Decode an `embeddings` row, falling back to the legacy JSON column if not yet migrated."""
+    if vector is not None:
+        return decode_vector(vector)
+    return np.asarray(json.loads(embedding), dtype=VECTOR_DTYPE)
@@ -1,5 +1,11 @@
 from textual.app import App
 from clio.ui.screens.dashboard import DashboardScreen
+from clio.db.ops import load_embedding_index
+from clio.core.trash import purge_expired_trash
+from clio.core.cache import content_cache
+from clio.db import aio
+from clio.db.migrate import upgrade_schema
+from clio.utils.log_util import log_message
 
 class ClioApp(App):
     """Main entry point for Clio Textual UI."""
@@ -8,9 +14,24 @@ class ClioApp(App):
     CSS_PATH = "main.css"
 
     async def on_mount(self):
+        # Apply pending schema migrations before the dashboard queries the tree
+        for name in await aio.run_db(upgrade_schema):
+            log_message(f"Applied schema migration: {name}", "info")
+
         self.install_screen(DashboardScreen(), name="dashboard")
         await self.push_screen("dashboard")
 
+        # Map the embedding cache and fetch only changed rows, off the event loop
+        self.run_worker(load_embedding_index, thread=True, group="embeddings", exit_on_error=False)
+
+        # Permanently remove trash older than CLIO_TRASH_DAYS, in small transactions
+        self.run_worker(purge_expired_trash, thread=True, group="trash", exit_on_error=False)
+
+    def on_unmount(self):
+        # For tuning CLIO_CACHE_ENTRIES / CLIO_CACHE_BYTES
+        log_message(f"Content cache: {content_cache.stats()}", "info")
+        aio.shutdown()
+
 if __name__ == "__main__":
     ClioApp().run()
 
@@ -1,5 +1,5 @@
 from .base_screen import BaseScreen
-import json
+import inspect
 from textual.app import ComposeResult
 from textual.containers import Horizontal, Vertical, Container
 from ..widgets.tree_widget import RecordTree
@@ -11,11 +11,13 @@ from textual import events
 from ..widgets.controls import BaselineControlsWidget, DynamicControlsWidget
 from ...ui.widgets.move import MoveRecordWidget
 # from ...utils.openai import generate_title_ai
-from ...db.ops import update_record_title
 from ..widgets.dynamic_form import DynamicFormWidget 
 from ..widgets.relation import RelationListWidget 
 from clio.utils.markdown_utils import render_markdown
-from clio.db.ops import save_record_to_db, save_embeddings
+from clio.db.ops import save_record_to_db
+from clio.db import aio
+from clio.core.background import record_jobs
+from clio.core.cache import content_cache
 
 ##############################################################################################
 ####################################### CONTENT SCREEN #######################################
@@ -55,7 +57,9 @@ class ContentScreen(BaseScreen):
         if key in app_state.dynamic_bindings:
             action, description = app_state.dynamic_bindings[key]
             log_message(f"Executing: {description}", "info")
-            action()
+            result = action()  # ✅ Execute the function
+            if inspect.isawaitable(result):
+                self.run_worker(result, exit_on_error=False)  # ✅ Async actions wait for the database in a worker
             event.stop()
             self.query_one("DynamicControlsWidget").refresh()
 
@@ -107,21 +111,13 @@ class ContentScreen(BaseScreen):
         form_widget = self.query_one("DynamicFormWidget", DynamicFormWidget)
 
 
-        # ✅ Ensure schema is always a dictionary
-        schema = app_state.current_schema
-        if isinstance(schema, str):
-            try:
-                schema = json.loads(schema)
-            except json.JSONDecodeError:
-                log_message("❌ Error: Invalid JSON schema format.", "error")
-                return
+        if not form_widget.compiled:
+            log_message("❌ Error: The form has no schema.", "error")
+            return
 
-        header_fields = schema.get("header", [])
-        if isinstance(header_fields, str):
-            header_fields = [header_fields]  # Ensure always a list
-        content_fields = schema.get("content", [])
-        if isinstance(content_fields, str):
-            content_fields = [content_fields]  # Ensure always a list
+        # ✅ Same field lists the form was built from
+        header_fields = form_widget.compiled.header_fields
+        content_fields = form_widget.compiled.content_fields
 
         # ✅ Ensure `app_state.current_content` exists
         if not app_state.current_content:
@@ -142,16 +138,14 @@ class ContentScreen(BaseScreen):
                 log_message(f"✅ Extracted content '{field}': {updated_data[field]}", "debug")
 
 
-        # ✅ Apply updates to `app_state.current_content`
+        # ✅ Apply updates to `app_state.current_content` (the cached object is edited in place)
+        content_cache.invalidate(app_state.current_UUID)
         for key, value in updated_data.items():
-            if key in app_state.current_content.header:
-                app_state.current_content.header[key] = value
-            elif key in app_state.current_content.content:
-                app_state.current_content.content[key] = value
-            else:
+            if not app_state.current_content.set_field(key, value):  # ✅ Tracks changed fields for the save
                 log_message(f"⚠ Warning: Unknown key '{key}' in updated_data", "warning")
 
-        log_message(f"✅ Updated app_state.current_content: {app_state.current_content.__dict__}", "debug")
+        log_message(f"✅ Updated app_state.current_content: {app_state.current_content.as_dict()} "
+                    f"(changed: {sorted(app_state.current_content.dirty) or 'nothing'})", "debug")
 
         # ✅ Generate Markdown
         app_state.current_content_markdown = render_markdown(app_state.current_content)
@@ -230,30 +224,52 @@ class ContentScreen(BaseScreen):
 
 
     def action_generate_title(self):
-        """Generate a title using OpenAI and update the record in the database."""
+        """Generate a title using OpenAI in the background and update the record in the database."""
         if not app_state.current_UUID:
             log_message("No record selected for AI title generation.", "warning")
             return
 
-        new_title = generate_title_ai()
-        if new_title:
-            update_record_title(app_state.current_UUID, new_title)  # ✅ Update the database
-            self.query_one(RecordTree).refresh_tree()  # ✅ Refresh tree to show the new title
+        if not app_state.current_content:
+            log_message("No content loaded for AI title generation.", "warning")
+            return
+
+        record_jobs.submit(self.app, app_state.current_UUID, app_state.current_content.content,
+                           embed=False, title=True, on_title=self.on_title_generated)
+        log_message(f"⏳ Generating title for {app_state.current_UUID} in the background...", "info")
 
     def action_generate_embedding(self):
-        """Generate and store vector embeddings for the selected record."""
+        """Generate and store vector embeddings for the selected record in the background."""
         if not app_state.current_UUID:
             log_message("No record selected for embedding generation.", "warning")
             return
 
-        embedding = generate_embedding(app_state.current_UUID)
-        if embedding:
-            log_message(f"Embedding generated and stored.", "info")
+        if not app_state.current_content:
+            log_message("No content loaded for embedding generation.", "warning")
+            return
+
+        record_jobs.submit(self.app, app_state.current_UUID, app_state.current_content.content)
+
+    def on_title_generated(self, record_UUID: str, new_title: str) -> None:
+        """Called on the UI thread once a background title has been stored."""
+        log_message(f"✅ New title generated: {new_title}", "info")
+
+        if record_UUID == app_state.current_UUID and app_state.current_content:
+            # ✅ Update in-memory content; marked changed so the next save writes it to the content table
+            if not app_state.current_content.set_field("title", new_title):
+                app_state.current_content.header["title"] = new_title
+            app_state.current_content_markdown = render_markdown(app_state.current_content)
+            if self.is_attached:
+                self.query_one("#cnt-content-md").update(app_state.current_content_markdown)
+
+        try:
+            self.app.get_screen("dashboard").query_one(RecordTree).refresh_tree()  # ✅ Show the new title
+        except Exception as e:
+            log_message(f"⚠ Could not refresh tree after title update: {e}", "warning")
 
 ############################################# SAVE ###########################################
 
-    def action_save_to_db(self) -> None:
-        """Saves the updated state in `app_state.current_content` to the database and updates UI."""
+    async def action_save_to_db(self) -> None:
+        """Saves `app_state.current_content` to the database at once; embedding and missing titles follow in the background."""
 
         log_message("📝 Saving updated state to the database...", "info")
 
@@ -265,32 +281,29 @@ class ContentScreen(BaseScreen):
             log_message("❌ Cannot save: `app_state.current_content` is None.", "error")
             return
 
-        # ✅ Check if a title is already set
-        buffer_title = app_state.current_content.header.get("title") or app_state.current_content.header.get("name")
+        if not app_state.current_content.dirty:
+            log_message("✅ Nothing changed since the last save.", "info")
+            return
 
-        if not buffer_title:
-            log_message("🔍 No title found. Generating a new one...", "info")
-            new_title = generate_title_ai()
-            if new_title:
-                update_record_title(app_state.current_UUID, new_title)  # ✅ Update the database
-                app_state.current_content.header["title"] = new_title  # ✅ Update in-memory content
-                log_message(f"✅ New title generated: {new_title}", "info")
-        
-        update_record_title(app_state.current_UUID, buffer_title)  # ✅ Update the database
-        log_message(f"💾 Saving record embeddings {app_state.current_UUID}...", "info")  # ✅ Use `app_state.current_UUID`
-        save_embeddings(app_state.current_content)  # ✅ Save embeddings
+        # ✅ Content, title and modification date in one transaction, off the event loop
+        success = await aio.run_unit_of_work("save", save_record_to_db)
+        if not success:
+            log_message("❌ Error saving record to database.", "error")
+            return
 
-        log_message(f"✅ Record {app_state.current_UUID} saved with embeddings!", "info")  # ✅ Use `app_state.current_UUID`
+        log_message(f"✅ Record saved successfully to DB for UUID: {app_state.current_UUID}", "info")
 
-        # ✅ Call the database save function
-        success = save_record_to_db()
-        if success:
-            log_message(f"✅ Record saved successfully to DB for UUID: {app_state.current_UUID}", "info")
+        # ✅ A set title was saved with the content; a missing one is generated afterwards
+        buffer_title = app_state.current_content.header.get("title") or app_state.current_content.header.get("name")
+        if not buffer_title:
+            log_message("🔍 No title found. Generating a new one in the background...", "info")
 
-            # ✅ Refresh the Markdown widget to reflect saved changes
-            markdown_widget = self.query_one("#cnt-content-md")
-            markdown_widget.update(app_state.current_content_markdown)
-            log_message("✅ Markdown widget updated after save.", "info")
-        else:
-            log_message("❌ Error saving record to database.", "error")
+        # ✅ Network calls run in a worker; repeated saves of this record coalesce into one job
+        record_jobs.submit(self.app, app_state.current_UUID, app_state.current_content.content,
+                           embed=True, title=not buffer_title, on_title=self.on_title_generated)
+        log_message(f"💾 Queued embeddings for record {app_state.current_UUID}", "info")
 
+        # ✅ Refresh the Markdown widget to reflect saved changes
+        markdown_widget = self.query_one("#cnt-content-md")
+        markdown_widget.update(app_state.current_content_markdown)
+        log_message("✅ Markdown widget updated after save.", "info")
@@ -1,6 +1,6 @@
+import inspect
 from clio.ui.screens.details_screen import DetailsScreen
 from .base_screen import BaseScreen
-from sqlalchemy import text
 from textual.app import ComposeResult
 from textual.containers import Horizontal, Vertical, Container
 from ..widgets.tree_widget import RecordTree
@@ -15,17 +15,18 @@ from clio.utils.log_util import log_message
 from ..widgets.controls import BaselineControlsWidget, DynamicControlsWidget
 from .modal.selector import RecordTypeSelector  # Import the new widget
 from ...core.record import create_record
-from ...core.record import recursive_delete
+from ...core.trash import trash
 from .modal.confirmation import ConfirmationScreen
 from ...ui.widgets.move import MoveRecordWidget
 # from ...utils.openai_title import generate_title_ai
 from ...db.ops import update_record_title
-from ...db.db import engine
+from ...core.background import record_jobs
+from ...db import aio
+from ...core.genus import GenusDB
 from .modal.selector import AppendixSelectorScreen
 from .modal.genus import GenusPopup
 from .modal.appendix import AppendixRemoveScreen
 from ..widgets.relation import NewRelationWidget
-from .details_screen import DetailsScreen
 
 ##############################################################################################
 ###################################### DASHBOARD SCREEN ######################################
@@ -60,6 +61,7 @@ class DashboardScreen(BaseScreen):
         self.query_one(DynamicControlsWidget).refresh_table()
 
     @on(Tree.NodeSelected)
+    @on(RecordTree.PreviewLoaded)
     def update_markdown(self) -> None:
         markdown_widget = self.screen.query_one("#dash-content-md")
         markdown_widget.update(app_state.current_content_markdown)
@@ -76,7 +78,7 @@ class DashboardScreen(BaseScreen):
         # Reset all nodes' selected flags and refresh them
         def clear_selection(node):
             if node.data:
-                node.data["selected"] = False
+                node.data.selected = False
             node.refresh()  # Ensure render_label() is called
             for child in node.children:
                 clear_selection(child)
@@ -86,8 +88,8 @@ class DashboardScreen(BaseScreen):
 
         # Set selection flag on the selected node
         if event.node.data is None:
-            event.node.data = {}
-        event.node.data["selected"] = True
+            return
+        event.node.data.selected = True
         event.node.refresh()  # Ensure new selection gets re-rendered
 
 
@@ -98,7 +100,9 @@ class DashboardScreen(BaseScreen):
         if key in app_state.dynamic_bindings:
             action, description = app_state.dynamic_bindings[key]  # ✅ Retrieve function & description
             log_message(f"Executing: {description}", "info")  # ✅ Log what action is triggered
-            action()  # ✅ Execute the function
+            result = action()  # ✅ Execute the function
+            if inspect.isawaitable(result):
+                self.run_worker(result, exit_on_error=False)  # ✅ Async actions wait for the database in a worker
             event.stop()  # ✅ Stop further event propagation
             self.query_one("DynamicControlsWidget").refresh()
 
@@ -177,24 +181,21 @@ class DashboardScreen(BaseScreen):
         """Edit the selected genus or record."""
         if app_state.current_genus_UUID:
             log_message("✏️ Editing selected genus...", "info")
-            self.action_edit_genus()
+            return self.action_edit_genus()
         elif app_state.current_UUID:
             log_message("✏️ Editing selected record...", "info")
-            self.action_edit_record()
+            return self.action_edit_record()
         else:
             log_message("⚠ No genus or record selected for editing.", "warning")
 
-    def action_edit_genus(self) -> None:
+    async def action_edit_genus(self) -> None:
         """Action: Edit the currently selected genus."""
         genus_id = app_state.current_genus_UUID
         if not genus_id:
             log_message("⚠ No genus selected for editing.", "warning")
             return
 
-        query = text("SELECT name, description, genus_type_id FROM genus WHERE uuid = :uuid")
-
-        with engine.connect() as connection:
-            result = connection.execute(query, {"uuid": genus_id}).fetchone()
+        result = await aio.run_db(GenusDB.get_genus, genus_id)
 
         if not result:
             log_message("❌ Genus not found in database.", "error")
@@ -219,21 +220,24 @@ class DashboardScreen(BaseScreen):
         else: log_message("No parent record selected.", "error")
 
 
-    def action_edit_record(self) -> None:
+    async def action_edit_record(self) -> None:
         """Action: Modify the selected record."""
-        create_record("note", app_state.current_UUID)
+        await aio.run_db(create_record, "note", app_state.current_UUID)
     
     def action_content_screen(self):
         """Switch to the Content Editor screen."""
         if not app_state.current_UUID:
             log_message("No record selected for editing.", "warning")
             return
+        if not app_state.current_content:
+            log_message("Content is still loading.", "warning")
+            return
         
         from .content_screen import ContentScreen
         self.app.push_screen(ContentScreen())  # ✅ Load the content screen
 
 
-    def action_delete_record(self):
+    async def action_delete_record(self):
         """Triggered by a keybinding to delete a record or genus."""
         uuid = app_state.current_UUID or app_state.current_genus_UUID
 
@@ -241,22 +245,28 @@ class DashboardScreen(BaseScreen):
             log_message("No record or genus selected for deletion.", "warning")
             return
 
-        def confirm_deletion():
-            recursive_delete(uuid)
-            log_message(f"Recursively deleted children of: {uuid}", "info")
-
-            if app_state.current_genus_UUID:
-                from ...core.genus import GenusDB
-                GenusDB.delete_genus(app_state.current_genus_UUID)
-                log_message(f"Deleted genus: {app_state.current_genus_UUID}", "info")
-                app_state.current_genus_UUID = None
-
-            if app_state.current_UUID:
-                log_message(f"Deleted record: {app_state.current_UUID}", "info")
-                app_state.current_UUID = None
-                app_state.current_rectype = None
+        async def confirm_deletion():
+            # ✅ Only flags the subtree root; rows are purged later in the background
+            trashed = await aio.run_unit_of_work("trash", trash, uuid)
+            if not trashed:
+                log_message(f"❌ Could not move {uuid} to the trash.", "error")
+                return
+            log_message(f"Moved to trash: {uuid} (restore with `clio trash restore {uuid}`)", "info")
+
+            app_state.current_genus_UUID = None
+            app_state.current_UUID = None
+            app_state.current_rectype = None
+            self.query_one(RecordTree).refresh_tree()
+
+        # ✅ Say how much goes to the trash with it (one recursive query)
+        stats = await aio.subtree_stats(uuid)
+        if stats["records"]:
+            counts = ", ".join(f"{count} {rectype}" for rectype, count in sorted(stats["by_rectype"].items()))
+            message = f"Move this item and its {stats['records']} descendants ({counts}; {stats['depth']} levels deep) to the trash? (y/n)"
+        else:
+            message = "Move this item to the trash? (y/n)"
 
-        self.app.push_screen(ConfirmationScreen("Delete this item and all its children? (y/n)", confirm_deletion))
+        self.app.push_screen(ConfirmationScreen(message, confirm_deletion))
 
 
 ##############################################################################################
@@ -299,12 +309,14 @@ class DashboardScreen(BaseScreen):
 
 
     def action_generate_embedding(self):
-        """Generate and store vector embeddings for the selected record."""
+        """Generate and store vector embeddings for the selected record in the background."""
         if not app_state.current_UUID:
             log_message("No record selected for embedding generation.", "warning")
             return
 
-        embedding = generate_embedding(app_state.current_UUID)
-        if embedding:
-            log_message(f"Embedding generated and stored.", "info")
+        if not app_state.current_content:
+            log_message("No content loaded for embedding generation.", "warning")
+            return
+
+        record_jobs.submit(self.app, app_state.current_UUID, app_state.current_content.content)
 
@@ -3,7 +3,8 @@ from rich.text import Text
 from textual.containers import Container
 from textual.widgets import Static, Input, SelectionList
 from clio.core.state import app_state
-from clio.db.ops import save_appendix_entry_to_db  
+from clio.db.ops import save_appendix_entry_to_db, delete_from_database
+from clio.db import aio
 from clio.utils.log_util import log_message
 from clio.utils.markdown_utils import render_markdown
 from textual.css.query import NoMatches
@@ -48,7 +49,7 @@ class AppendixScreen(PopupScreen):
         first_input = next(iter(self.inputs.values()))
         first_input.focus()
 
-    def action_confirm(self):
+    async def action_confirm(self):
         """Confirm the appendix addition: update state, save to DB, and refresh UI."""
         data = {field: input_field.value.strip() for field, input_field in self.inputs.items()}
 
@@ -70,7 +71,7 @@ class AppendixScreen(PopupScreen):
         app_state.current_content.appendix[self.appendix_type].append(data)
 
         # ✅ Fix: Pass `data` as a dictionary, not unpacked
-        if save_appendix_entry_to_db(self.appendix_type, data):  # ✅ Corrected
+        if await aio.run_db(save_appendix_entry_to_db, self.appendix_type, data):  # ✅ Corrected
             log_message(f"✅ {self.appendix_type.capitalize()} successfully saved to database.", "info")
         else:
             log_message(f"❌ Error saving {self.appendix_type} to database.", "error")
@@ -147,33 +148,26 @@ class AppendixRemoveScreen(PopupScreen):
         yield self.selection_list
         yield Static("[Ctrl+Enter] Remove Selected    [Esc] Cancel", classes="footer")
 
-    def on_mount(self):
+    async def on_mount(self):
         """Populate the selection list when the screen is displayed."""
         log_message("📌 on_mount: Loading appendix items into selection list...", "debug")
-        self.populate_selection_list()
+        await self.populate_selection_list()
 
 
 
 ##############################################################################################
 ################################### POPULATE SELECTION LIST ##################################
 
-    def populate_selection_list(self):
+    async def populate_selection_list(self):
         """Query all appendix items from the database and load them into the selection list."""
         log_message("📌 populate_selection_list: Querying database for appendices...", "debug")
         self.selection_list.clear_options()
 
-        query = text("""
-            SELECT UUID, note AS name, 'note' AS appendix_type FROM rec_note WHERE rec_UUID = :record_UUID
-            UNION ALL
-            SELECT UUID, CONCAT(name, ' (', COALESCE(author, 'Unknown'), ', ', COALESCE(CAST(year AS CHAR), 'Unknown'), ')') AS name, 'source' AS appendix_type FROM rec_source WHERE rec_UUID = :record_UUID
-            UNION ALL
-            SELECT UUID, CONCAT(title, ': ', url) AS name, 'url' AS appendix_type FROM rec_url WHERE rec_UUID = :record_UUID
-        """)
-
-        params = {"record_UUID": app_state.current_UUID}
-
-        with next(get_db()) as db:
-            results = db.execute(query, params).fetchall()
+        # ✅ Same cache and single-query loader as `fetch_content`, off the event loop
+        preview = await aio.load_preview(app_state.current_UUID, app_state.current_rectype) if app_state.current_rectype else None
+        content = preview[0] if preview else None
+        results = [(uuid, self.appendix_label(appendix_type, row), appendix_type)
+                   for appendix_type, uuid, row in (content.appendix_items if content else [])]
 
         log_message(f"📌 Retrieved {len(results)} appendices from database", "debug")
 
@@ -189,6 +183,15 @@ class AppendixRemoveScreen(PopupScreen):
 ##############################################################################################
 ################################### FORMAT SELECTION LIST ITEMS ##############################
 
+    @staticmethod
+    def appendix_label(appendix_type, row):
+        """Label of an appendix row in the selection list."""
+        if appendix_type == "note":
+            return row["note"]
+        if appendix_type == "source":
+            return f"{row['name']} ({row['author'] or 'Unknown'}, {row['year'] or 'Unknown'})"
+        return f"{row['title']}: {row['url']}"
+
     def format_appendix_item(self, appendix_type, item):
         """Format an appendix item for display in the selection list."""
         log_message(f"📌 format_appendix_item: Formatting {appendix_type}: {item} (Type: {type(item)})", "debug")
@@ -214,7 +217,7 @@ class AppendixRemoveScreen(PopupScreen):
 ##############################################################################################
 ####################@@@@#### CONFIRM AND REMOVE FROM DB AND APP_STATE ########################
 
-    def action_confirm_removal(self):
+    async def action_confirm_removal(self):
         """Remove selected appendix items."""
         selected_items = self.selection_list.selected  # List of (appendix_type, UUID) tuples
 
@@ -224,11 +227,15 @@ class AppendixRemoveScreen(PopupScreen):
 
         log_message(f"🗑 Removing {len(selected_items)} appendix items...", "info")
 
-        for appendix_type, uuid in selected_items:
-            log_message(f"📌 Removing {appendix_type} with UUID: {uuid}", "debug")
-            
-            # ✅ No need to convert UUIDs into dicts
-            delete_from_database(appendix_type, uuid)  
+        def remove_all():
+            for appendix_type, uuid in selected_items:
+                log_message(f"📌 Removing {appendix_type} with UUID: {uuid}", "debug")
+
+                # ✅ No need to convert UUIDs into dicts
+                delete_from_database(appendix_type, uuid)
+
+        # ✅ All deletions share one pooled connection, off the event loop
+        await aio.run_unit_of_work("remove appendix", remove_all)
 
         # Refresh UI
         app_state.current_content_markdown = render_markdown(app_state.current_content)
@@ -1,3 +1,4 @@
+import inspect
 from textual.screen import Screen
 from textual.containers import Container
 from textual.widgets import Static
@@ -33,7 +34,9 @@ class ConfirmationScreen(Screen):
     def on_key(self, event: events.Key) -> None:
         """Handle keyboard input: 'y' to confirm, 'n' to cancel."""
         if event.key == "y":
-            self.on_confirm()
+            result = self.on_confirm()
+            if inspect.isawaitable(result):
+                self.app.run_worker(result, exit_on_error=False)  # ✅ Async callbacks wait for the database in a worker
             self.app.pop_screen()  # Close the confirmation screen
         elif event.key == "n":
             self.app.pop_screen()  # Close the screen without action
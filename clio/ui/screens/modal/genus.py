@@ -3,8 +3,9 @@ from textual.screen import Screen
 from textual.containers import Container
 from textual.widgets import Input, Select
 from textual.app import ComposeResult
-from ....db.db import engine
+from ....db.db import get_db
 from ....core.genus import GenusDB
+from ....db import aio
 from .baseline_popup import PopupScreen
 
 class GenusPopup(PopupScreen):
@@ -27,16 +28,13 @@ class GenusPopup(PopupScreen):
             "shortname": Input(placeholder="Short Name", classes="form-textfield"),
             "longname": Input(placeholder="Long Name", classes="form-textfield"),
         }
-        self.select = Select(self.get_genus_types(), prompt="Select Genus Type")
+        self.select = Select([], prompt="Select Genus Type")  # Options are loaded in `on_mount`
 
 
     @staticmethod
-    def get_genus_types():
-        """Retrieve genus types from the database, ensuring valid integer IDs."""
-        query = text("SELECT id, shortname FROM genus_type;")
-        with engine.connect() as connection:
-            result = connection.execute(query)
-            return [(row[1], str(row[0])) for row in result.fetchall()]
+    async def get_genus_types():
+        """Genus types from the metadata cache, as `(label, id)` options."""
+        return [(genus_type["shortname"], str(genus_type["id"])) for genus_type in await aio.genus_types()]
 
 
     def compose(self) -> ComposeResult:
@@ -47,8 +45,9 @@ class GenusPopup(PopupScreen):
         )
 
 
-    def on_mount(self):
+    async def on_mount(self):
         """Focus the first input field and prefill if editing."""
+        self.select.set_options(await self.get_genus_types())
         if self.mode == "edit" and self.genus_data:
             self.inputs["shortname"].value = self.genus_data.get("shortname", "")
             self.inputs["longname"].value = self.genus_data.get("longname", "")
@@ -56,7 +55,7 @@ class GenusPopup(PopupScreen):
         self.inputs["shortname"].focus()
 
 
-    def action_confirm(self):
+    async def action_confirm(self):
         """Create or update genus."""
         data = {field: input_field.value.strip() for field, input_field in self.inputs.items()}
         selected_genus_type = self.select.value
@@ -71,11 +70,10 @@ class GenusPopup(PopupScreen):
             genus_type_id = int(selected_genus_type)
 
             if self.mode == "edit":
-                from ...core.genus import GenusDB  # Adjust import
-                GenusDB.update_genus(self.genus_data["uuid"], data["shortname"], data["longname"], genus_type_id)
+                await aio.run_unit_of_work("genus", GenusDB.update_genus, self.genus_data["uuid"], data["shortname"], data["longname"], genus_type_id)
                 log_message(f"✏️ Genus updated: {data}", "info")
             else:
-                genus_id = GenusDB.create_genus(data["shortname"], data["longname"], genus_type_id)
+                genus_id = await aio.run_unit_of_work("genus", GenusDB.create_genus, data["shortname"], data["longname"], genus_type_id)
                 log_message(f"✅ Genus added: {data} (ID: {genus_id})", "info")
 
         except Exception as e:
@@ -91,7 +89,7 @@ class GenusPopup(PopupScreen):
             UPDATE genus SET shortname = :shortname, longname = :longname, genus_type_id = :type_id
             WHERE uuid = :uuid
         """)
-        with engine.connect() as conn:
+        with next(get_db()) as conn:
             conn.execute(query, {"uuid": uuid, "shortname": shortname, "longname": longname, "type_id": type_id})
             conn.commit()
 
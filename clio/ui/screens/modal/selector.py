@@ -12,6 +12,8 @@ from sqlalchemy.sql import text  # Import text for raw SQL execution
 from ....core.record import create_record
 from ....db.db import get_db
 from clio.core.state import app_state
+from ....db import aio
+from clio.core.content import compiled_rectype
 from clio.utils.log_util import log_message
 from textual.app import ComposeResult
 from .appendix import AppendixNoteScreen, AppendixURLScreen, AppendixSourceScreen
@@ -34,9 +36,9 @@ class RecordTypeSelector(PopupScreen):
         yield from self.compose_popup(self.option_list)
 
 
-    def on_mount(self):
+    async def on_mount(self):
         """Populate options when the screen loads."""
-        self.populate_options()
+        await self.populate_options()
 
 
 
@@ -44,9 +46,9 @@ class RecordTypeSelector(PopupScreen):
 ##############################################################################################
 ################################### POPULATE OPTION LIST #####################################
 
-    def populate_options(self):
+    async def populate_options(self):
         """Fetch record types and populate the option list."""
-        record_types = self.get_record_types()
+        record_types = await self.get_record_types()
         if not record_types:
             log_message("⚠ Warning: No record types found!", "warning")
             return
@@ -56,22 +58,19 @@ class RecordTypeSelector(PopupScreen):
 
         log_message(f"✅ Populated record types: {record_types}", "debug")
 
-    def get_record_types(self):
-        """Fetch available record types from the `rectype` table."""
-        with next(get_db()) as db:
-            result = db.execute(text("SELECT name FROM rectype"))
-            tables = [row[0] for row in result]  # ✅ Store as lowercase for consistency
-        return tables
+    async def get_record_types(self):
+        """Available record types, served from the metadata cache (loaded off the event loop)."""
+        return await aio.rectype_names()
 
-    def on_key(self, event: Key) -> None:
+    async def on_key(self, event: Key) -> None:
         """Handle keyboard navigation and selection."""
         if event.key == "escape":
             log_message("❌ Record type selection canceled.", "info")
             self.dismiss()
         elif event.key == "enter":
-            self.create_selected_record()
+            await self.create_selected_record()
 
-    def create_selected_record(self):
+    async def create_selected_record(self):
         """Create a new record from the selected type and close the popup."""
         selected_option = self.option_list.highlighted  # ✅ Get highlighted index
 
@@ -79,7 +78,7 @@ class RecordTypeSelector(PopupScreen):
             rectype = self.option_list.get_option_at_index(selected_option).prompt.lower()  # ✅ Normalize case
             log_message(f"✅ Creating record of type: {rectype}", "info")
 
-            create_record(rectype, app_state.current_UUID)  # ✅ Create new record
+            await aio.run_db(create_record, rectype, app_state.current_UUID)  # ✅ Create new record
             self.dismiss()
 
 ##############################################################################################
@@ -106,28 +105,26 @@ class RelTypeSelector(PopupScreen):
         yield from self.compose_popup(self.description_input, self.relation_select)
 
 
-    def on_mount(self):
-        """Populate the select widget with relation types from DB."""
-        with next(get_db()) as db:
-            result = db.execute(text("SELECT name, id FROM reltype ORDER BY name"))
-            options = [(name.capitalize(), int(reltype_id)) for name, reltype_id in result]
-            self.relation_select.set_options(options)
+    async def on_mount(self):
+        """Populate the select widget with relation types from the metadata cache."""
+        options = [(reltype["name"].capitalize(), int(reltype["id"])) for reltype in await aio.reltypes()]
+        self.relation_select.set_options(options)
 
-            # Set default to ID 99 if it exists
-            for label, value in options:
-                if value == 99:
-                    self.relation_select.value = 99
-                    break
+        # Set default to ID 99 if it exists
+        for label, value in options:
+            if value == 99:
+                self.relation_select.value = 99
+                break
 
 
-    def on_key(self, event: Key) -> None:
+    async def on_key(self, event: Key) -> None:
         if event.key == "escape":
             log_message("❌ Relation creation cancelled.", "info")
             self.dismiss()
         elif event.key == "enter":
-            self.confirm_relation()
+            await self.confirm_relation()
 
-    def confirm_relation(self):
+    async def confirm_relation(self):
         """Confirm selection and insert the relation."""
         if self.relation_select.is_blank():
             log_message("⚠ No relation type selected.", "warning")
@@ -136,22 +133,26 @@ class RelTypeSelector(PopupScreen):
         reltype_id = self.relation_select.value
         description = self.description_input.value.strip()
 
-        new_uuid = str(uuid.uuid4())
-        with next(get_db()) as db:
-            db.execute(
-                text("""
-                    INSERT INTO relations (UUID, rec_UUID, rel_rec_UUID, reltype_id, description)
-                    VALUES (:uuid, :rec, :rel, :reltype, :desc)
-                """),
-                {
-                    "uuid": new_uuid,
-                    "rec": self.source_uuid,
-                    "rel": self.target_uuid,
-                    "reltype": reltype_id,
-                    "desc": description
-                }
-            )
-            db.commit()
+        values = {
+            "uuid": str(uuid.uuid4()),
+            "rec": self.source_uuid,
+            "rel": self.target_uuid,
+            "reltype": reltype_id,
+            "desc": description
+        }
+
+        def insert_relation():
+            with next(get_db()) as db:
+                db.execute(
+                    text("""
+                        INSERT INTO relations (UUID, rec_UUID, rel_rec_UUID, reltype_id, description)
+                        VALUES (:uuid, :rec, :rel, :reltype, :desc)
+                    """),
+                    values
+                )
+                db.commit()
+
+        await aio.run_db(insert_relation)  # ✅ Off the event loop
 
         log_message(f"✅ Created relation {self.source_uuid} --[{reltype_id}]--> {self.target_uuid}", "info")
         self.dismiss()
@@ -198,11 +199,9 @@ class AppendixSelectorScreen(PopupScreen):
         log_message(f"✅ Populated appendix options: {appendix_types}", "debug")
 
     def get_available_appendices(self):
-        """Retrieve available appendix types from `current_schema`."""
-        appendix_options = app_state.current_schema.get("appendix", [])
-
-        if isinstance(appendix_options, str):
-            appendix_options = [appendix_options]  # ✅ Convert to list if it's a string
+        """Retrieve available appendix types from the compiled schema of the current rectype."""
+        compiled = compiled_rectype(app_state.current_rectype) if app_state.current_rectype else None
+        appendix_options = compiled.appendix if compiled else []
 
         log_message(f"📜 Available appendices: {appendix_options}", "debug")
         return appendix_options if appendix_options else ["None"]
@@ -1,4 +1,5 @@
 from clio.core.state import app_state
+from clio.core.content import compiled_rectype
 from clio.utils.log_util import log_message
 from textual.containers import Container, Vertical
 from textual.widgets import Input, TextArea, Label
@@ -10,12 +11,13 @@ from textual.app import ComposeResult
 ##############################################################################################
 
 class DynamicFormWidget(Vertical):
-    """Dynamically generated form based on `app_state.current_schema`."""
+    """Dynamically generated form based on the compiled schema of `app_state.current_rectype`."""
 
     def __init__(self):
         super().__init__()
         self.header_inputs = {}  # Stores header input fields
         self.content_inputs = {}  # Stores content input fields
+        self.compiled = None  # Compiled rectype the form is built from
 
     def compose(self) -> ComposeResult:
         """Define the form structure (but do not populate values yet)."""
@@ -33,7 +35,8 @@ class DynamicFormWidget(Vertical):
         log_message("🔍 Debug: Entering DynamicFormWidget.on_mount()", "debug")
 
         # ✅ Check if schema exists
-        if not app_state.current_schema:
+        self.compiled = compiled_rectype(app_state.current_rectype) if app_state.current_rectype else None
+        if not self.compiled:
             log_message("❌ ERROR: Schema is empty, cannot build form.", "error")
             return
 
@@ -44,7 +47,7 @@ class DynamicFormWidget(Vertical):
             log_message("❌ ERROR: `app_state.current_content` is empty, aborting form generation.", "error")
             return
 
-        log_message(f"🟢 Content Instance Fields: {vars(content_data)}", "debug")
+        log_message(f"🟢 Content Instance Fields: {content_data.as_dict()}", "debug")
 
         # ✅ Populate Header Fields
         log_message("🔍 Debug: Populating header fields...", "debug")
@@ -62,10 +65,7 @@ class DynamicFormWidget(Vertical):
     def populate_header_fields(self, content_data):
         """Fill header fields with values."""
 
-        # ✅ Ensure header_fields is always a list
-        header_fields = app_state.current_schema.get("header", [])
-        if isinstance(header_fields, str):
-            header_fields = [header_fields]  # ✅ Convert single string to list
+        header_fields = self.compiled.header_fields
 
         existing_ids = set()  # ✅ Track IDs to prevent duplicates
 
@@ -105,10 +105,7 @@ class DynamicFormWidget(Vertical):
     def populate_content_fields(self, content_data):
         """Fill content fields with values."""
 
-        # ✅ Ensure content_fields is always a list
-        content_fields = app_state.current_schema.get("content", [])
-        if isinstance(content_fields, str):
-            content_fields = [content_fields]  # ✅ Convert single string to list
+        content_fields = self.compiled.content_fields
 
         content_caption = app_state.current_content_caption or "Content"
 
@@ -9,6 +9,7 @@ from clio.core.state import app_state
 from clio.utils.log_util import log_message
 from textual import on
 from ...db.db import get_db
+from ...db import aio
 from sqlalchemy.sql import text
 from ...utils.queries import get_all_descendants
 from ..widgets.tree_widget import RecordTree  # ✅ Import RecordTree
@@ -73,27 +74,26 @@ class MoveRecordWidget(Widget):
     #         # Reset keybindings and refresh tree
     #         self.reset_bindings()
 
-    def confirm_move(self):
+    async def confirm_move(self):
         """Confirm and move the record after the user presses `m` again."""
         try:
             tree = self.screen.query_one(RecordTree)  # ✅ Get tree instance
             selected_node = tree.cursor_node  # ✅ Get selected node
 
             if selected_node and selected_node.data:
-                self.new_parent_UUID = selected_node.data.get("UUID")
+                self.new_parent_UUID = selected_node.data.UUID
 
             if not self.new_parent_UUID:
                 log_message("No valid parent selected. Move cancelled.", "warning")
                 return
 
-            # ✅ Prevent moving into its own descendant
-            descendants = get_all_descendants(self.move_UUID)
-            if self.new_parent_UUID in descendants:
+            # ✅ Prevent moving into itself or its own descendant (one recursive query)
+            if self.new_parent_UUID == self.move_UUID or self.new_parent_UUID in await aio.run_db(get_all_descendants, self.move_UUID):
                 log_message("Error: Cannot move record into its own child.", "error")
                 return
 
             # Move the record
-            self.move_record(self.move_UUID, self.new_parent_UUID)
+            await aio.run_db(self.move_record, self.move_UUID, self.new_parent_UUID)
 
             # Remove widget after move
             self.remove()
@@ -1,6 +1,6 @@
 from textual.widget import Widget
-from ...db.ops import fetch_content
-from ...utils.markdown_utils import render_markdown
+from functools import partial
+from ...db import aio
 from textual.reactive import reactive
 from textual.containers import Container
 from textual.app import ComposeResult
@@ -13,8 +13,7 @@ from ..widgets.tree_widget import RecordTree
 from ...ui.screens.modal.selector import RelTypeSelector
 from textual.widgets import DataTable
 from textual.message import Message
-from textual.reactive import reactive
-from ...db.ops import fetch_relations_for_record  # Assume this exists
+from clio.core.metadata import metadata
 from textual.events import Key
 # from textual.widgets import OptionList, Input
 # from textual.widgets.option_list import Option
@@ -55,7 +54,7 @@ class NewRelationWidget(Widget):
             selected_node = tree.cursor_node
 
             if selected_node and selected_node.data:
-                self.target_UUID = selected_node.data.get("UUID")
+                self.target_UUID = selected_node.data.UUID
 
             if not self.target_UUID or self.target_UUID == self.source_UUID:
                 log_message("Invalid or same record selected. Relation cancelled.", "warning")
@@ -106,7 +105,15 @@ class RelationListWidget(DataTable):
         if not self.current_uuid:
             return
 
-        self.relations = fetch_relations_for_record(self.current_uuid)
+        # ✅ Queried on the DB threads; a newer record replaces a pending load
+        self.run_worker(partial(self.load_relations, self.current_uuid), group="relations", exclusive=True, exit_on_error=False)
+
+    async def load_relations(self, uuid: str) -> None:
+        relations = await aio.fetch_relations_for_record(uuid)
+        if uuid != self.current_uuid:
+            return
+        self.clear()
+        self.relations = relations
         for rel in self.relations:
             self.add_row(
                 rel["direction"],
@@ -115,17 +122,24 @@ class RelationListWidget(DataTable):
                 rel["description"] or "",
             )
 
-    def on_key(self, event: Key) -> None:
+    async def on_key(self, event: Key) -> None:
         if event.key == "enter" and self.cursor_row is not None:
             if 0 <= self.cursor_row < len(self.relations):
-                target_id = self.relations[self.cursor_row]["target_id"]
+                relation = self.relations[self.cursor_row]
+                target_id = relation["target_id"]
                 log_message(f"[RelationList] Enter pressed. Switching to UUID: {target_id}", "info")
-                app_state.current_UUID = target_id
 
-                content_instance = fetch_content(target_id)
-                if content_instance:
-                    markdown = render_markdown(content_instance)
-                    app_state.current_content_markdown = markdown
+                # ✅ Loaded with the target's own rectype, off the event loop
+                info = metadata.rectype(relation["target_rectype_id"])
+                preview = await aio.load_preview(target_id, info.name)
+                if preview:
+                    app_state.current_UUID = target_id
+                    app_state.current_rectype = info.name
+                    app_state.current_render_class = info.content_render_class
+                    app_state.current_content_caption = info.content_caption
+                    app_state.current_schema = info.content_schema
+                    app_state.current_record_name = relation["target_name"]
+                    app_state.current_content, app_state.current_content_markdown = preview
                     from ...ui.screens import content_screen
                     self.app.push_screen(content_screen.ContentScreen())  # type: ignore
                 else:
@@ -1,11 +1,9 @@
 from textual.widgets import Tree, Static
 from textual.containers import Vertical
 from clio.utils.log_util import log_message
-import numpy as np
-
-import json
-import numpy as np
-from sqlalchemy.sql import text
+from clio.utils.embedding_index import embedding_index
+from clio.utils.embeddings import embed_texts
+from clio.db.ops import load_embedding_index
 
 ##############################################################################################
 ############################## Cosine Similarity Matching / Graph ############################
@@ -50,38 +48,20 @@ class SimilarityGraphWidget(Vertical):
 ############################## FIND RECORDS ############################
 
 def find_similar_records(query_text, top_n=5):
-    """Find similar records using cosine similarity from embeddings table."""
+    """Find similar records using cosine similarity against the in-memory embedding index."""
 
     # ✅ Generate embedding for the query
-    client = OpenAI()
-    response = client.embeddings.create(input=query_text, model="text-embedding-ada-002")
-    query_embedding = response.data[0].embedding
-
-    with next(get_db()) as db:
-        try:
-            query = text("""
-                SELECT rec_UUID, embedding
-                FROM embeddings
-                WHERE model = 'text-embedding-ada-002'
-            """)
-            results = db.execute(query).fetchall()
-
-            # ✅ Compute cosine similarity for each record
-            similarities = []
-            for rec_UUID, stored_embedding in results:
-                stored_embedding = json.loads(stored_embedding)  # Convert from JSON
-                similarity = np.dot(query_embedding, stored_embedding) / (
-                    np.linalg.norm(query_embedding) * np.linalg.norm(stored_embedding)
-                )
-                similarities.append((rec_UUID, similarity))
-
-            # ✅ Sort by similarity (higher = more similar)
-            similarities.sort(key=lambda x: x[1], reverse=True)
-
-            # ✅ Return the top N results
-            return similarities[:top_n]
-
-        except Exception as e:
-            log_message(f"❌ Error in similarity search: {str(e)}", "error")
-            return []
+    query_embedding = embed_texts([query_text])[0]
+
+    try:
+        # ✅ Open the cached index once per process (normally already done at app startup)
+        if not embedding_index.loaded:
+            fetched = load_embedding_index()
+            log_message(f"Similarity index ready: {len(embedding_index)} embeddings ({fetched} fetched)", "info")
+
+        # ✅ Return the top N results
+        return embedding_index.search(query_embedding, top_n=top_n)
 
+    except Exception as e:
+        log_message(f"❌ Error in similarity search: {str(e)}", "error")
+        return []
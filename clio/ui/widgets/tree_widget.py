@@ -1,35 +1,123 @@
 from textual.widgets import Tree
 from textual.screen import Screen
 from textual.widgets.tree import TreeNode
-from textual.reactive import reactive
-from ...db.ops import fetch_tree_data, fetch_content
-from clio.utils.markdown_utils import render_markdown  # Import the updated tree data fetch
+import asyncio
+import os
+from functools import partial
+from ...db import aio
 from rich.text import Text
 from clio.core.state import app_state
+from clio.core.metadata import metadata, RectypeInfo
+from clio.core.prefetch import prefetcher, PREFETCH_CHILDREN
+from clio.core.cache import content_cache
 from clio.utils.log_util import log_message
 from rich.style import Style
-from textual.widgets import Tree
 from textual.events import Key
-from textual.widgets import Tree
 from textual.message import Message
 from textual.widgets.tree import TreeNode, TreeDataType
 
 
 
+PREVIEW_DEBOUNCE = float(os.getenv("CLIO_PREVIEW_DEBOUNCE", "0.08"))  # Seconds a selection must stay before loading
+PREVIEW_PLACEHOLDER = "*Loading…*"
+
+# Lazy mode loads the children of a node on first expand instead of the whole tree at startup
+TREE_LAZY = os.getenv("CLIO_TREE_LAZY", "1") != "0"
+
+
+##############################################################################################
+##################################### NODE PAYLOADS ##########################################
+
+class NodeData:
+    """Compact `node.data` payload; `loaded` marks nodes whose children are in the tree."""
+
+    __slots__ = ("UUID", "name", "loaded", "selected")
+    type = None
+
+    def __init__(self, UUID: str, name: str | None, loaded: bool = True):
+        self.UUID = UUID
+        self.name = name
+        self.loaded = loaded
+        self.selected = False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.UUID!r}, {self.name!r})"
+
+
+class RecordNodeData(NodeData):
+    """Record node: rectype metadata is looked up in the shared metadata cache by `rectype_id`."""
+
+    __slots__ = ("rectype_id",)
+    type = "record"
+
+    def __init__(self, UUID: str, name: str | None, rectype_id: int, loaded: bool = True):
+        super().__init__(UUID, name, loaded)
+        self.rectype_id = rectype_id
+
+    @property
+    def info(self) -> RectypeInfo:
+        return metadata.rectype(self.rectype_id)
+
+    @property
+    def rectype(self) -> str:
+        return self.info.name
+
+    @property
+    def icon(self) -> str:
+        return self.info.icon
+
+    @property
+    def content_schema(self) -> dict:
+        return self.info.content_schema
+
+    @property
+    def content_caption(self) -> str:
+        return self.info.content_caption
+
+    @property
+    def content_render_class(self) -> str:
+        return self.info.content_render_class
+
+
+class GenusNodeData(NodeData):
+    __slots__ = ("description", "genus_type_id")
+    type = "genus"
+
+    def __init__(self, UUID: str, name: str, description: str | None, genus_type_id: int, loaded: bool = True):
+        super().__init__(UUID, name, loaded)
+        self.description = description
+        self.genus_type_id = genus_type_id
+
+
 class RecordTree(Tree):
     """Tree widget that displays genus and record hierarchy."""
 
     CSS_PATH = "tree.css"
 
+    class PreviewLoaded(Message):
+        """Posted when the content of the selected record has been loaded."""
+
+        def __init__(self, record_UUID: str):
+            super().__init__()
+            self.record_UUID = record_UUID
+
+
     def __init__(self, screen: Screen):
-        self.data = fetch_tree_data()  # Fetch the data (genera and records)
+        self.lazy = TREE_LAZY
+        self.expanded_nodes: set[str] = set()  # UUIDs of expanded nodes, restored on refresh
+        self.nodes: dict[str, TreeNode] = {}  # UUID -> node, for patching the tree in place
         super().__init__("Records")  # Set the correct root label
-        self.populate_tree()  # Populate the tree with data
         self.selected_node = None  # Keep track of the selected node
         self.show_root = False
         self.show_guides = False
-        self.expanded_nodes: set[str] = set()
 
+    async def on_mount(self) -> None:
+        """Load the tree off the event loop; the screen stays responsive until the data arrives."""
+        if self.lazy:
+            data = {"genera": await aio.fetch_genera(), "records": []}
+        else:
+            data = await aio.fetch_tree_data()
+        self.populate_tree(data)  # Populate the tree with data
 
 
     def on_key(self, event):
@@ -41,25 +129,175 @@ class RecordTree(Tree):
             event.stop()  # Prevent default expansion behavior
 
     def refresh_tree(self):
-        self.data = fetch_tree_data()
-        self.clear()
-        self.populate_tree()
-
-        # Restore expanded state
-        for node_id in self.expanded_nodes:
-            try:
-                node = self.get_node_by_id(node_id)
-                node.expand()
-            except Exception:
-                pass  # Node no longer exists, skip
+        """Refresh the tree in a worker; a newer refresh replaces one still waiting for the database."""
+        self.run_worker(self.refresh_tree_async, group="refresh", exclusive=True, exit_on_error=False)
+
+    async def refresh_tree_async(self):
+        """Patch the tree to match the database: add, remove, relabel or reparent changed nodes only.
+
+        Untouched nodes keep their expansion state, and the cursor stays on the same record.
+        """
+        queried: set[str] = set()  # Parents whose children are in `records`
+        if self.lazy:
+            # Reload only the levels that are on screen: children of every loaded node
+            queried.update(uuid for uuid, node in self.nodes.items() if node.data.loaded)
+            genera, records = await asyncio.gather(aio.fetch_genera(), aio.fetch_children_of(list(queried)))
+
+            # ✅ Nodes expanded while the queries ran: fetch their children too, or the patch would drop them
+            while newly_loaded := [uuid for uuid, node in self.nodes.items() if node.data.loaded and uuid not in queried]:
+                queried.update(newly_loaded)
+                records += await aio.fetch_children_of(newly_loaded)
+        else:
+            data = await aio.fetch_tree_data()
+            genera, records = data["genera"], data["records"]
+
+        # ✅ Read after the queries: the cursor may have moved while they ran
+        cursor_uuid = self.cursor_node.data.UUID if self.cursor_node and self.cursor_node.data else None
 
+        self.patch_genera(genera)
+        self.patch_records(records, queried)
+
+        if cursor_uuid in self.nodes:
+            self.move_cursor(self.nodes[cursor_uuid])
         self.refresh(layout=True)
 
+    def patch_genera(self, genera):
+        wanted = {genus["UUID"]: genus for genus in genera}
+
+        for uuid, node in list(self.nodes.items()):
+            if node.data.type == "genus" and uuid not in wanted:
+                self.remove_node(node)
+
+        renamed = False
+        for genus in sorted(genera, key=lambda g: g["name"].lower()):
+            node = self.nodes.get(genus["UUID"])
+            if node is None:
+                self.add_genus_node(genus, before=self.sorted_position(self.root, genus["name"]))
+                continue
+            if node.data.name != genus["name"] or node.data.description != genus["description"]:
+                renamed |= node.data.name != genus["name"]
+                node.data.name, node.data.description = genus["name"], genus["description"]
+                node.set_label(self.genus_label(genus))
+            if self.lazy:
+                node.allow_expand = bool(genus["child_count"]) or bool(node.children)
+
+        if renamed:
+            self.sort_children(self.root)
+
+    def patch_records(self, records, queried: set[str]):
+        """Patch record nodes to `records`; in lazy mode these are the children of the `queried` parents."""
+        children_by_parent: dict[str, list] = {}
+        for record in records:
+            children_by_parent.setdefault(record["parent_UUID"], []).append(record)
+        wanted = {record["UUID"] for record in records}
+
+        # Step 1: Drop nodes whose record is gone, trashed, or moved out of the loaded part of the tree
+        for uuid, node in list(self.nodes.items()):
+            if node.data.type == "record" and uuid not in wanted and uuid in self.nodes:
+                self.remove_node(node)
+
+        # Step 2: Walk down from the genera, so every parent exists before its children are patched
+        queue = [uuid for uuid, node in self.nodes.items() if node.data.type == "genus"]
+        renamed_parents = set()
+        while queue:
+            parent_uuid = queue.pop()
+            parent_node = self.nodes.get(parent_uuid)
+            if parent_node is None or not parent_node.data.loaded:
+                continue
+
+            for record in sorted(children_by_parent.get(parent_uuid, []), key=lambda r: (r["name"] or "").lower()):
+                node = self.nodes.get(record["UUID"])
+
+                if node is not None and node.parent is not parent_node:
+                    self.remove_node(node)  # ✅ Reparent: Textual nodes cannot move, so re-add below
+                    node = None
+
+                if node is None:
+                    node = self.add_record_node(parent_node, record,
+                                                before=self.sorted_position(parent_node, record["name"]))
+                    if record["UUID"] in self.expanded_nodes:
+                        if record["UUID"] in queried:
+                            node.data.loaded = True  # ✅ Its children were fetched with this level; added below
+                        # Otherwise (moved in from an unloaded part of the tree) the expand event loads them
+                        node.expand()
+                elif self.update_record_node(node, record):
+                    renamed_parents.add(parent_uuid)
+
+                queue.append(record["UUID"])
+
+        # Step 3: Renamed nodes keep their place when relabelled; restore the order a reload gives
+        for parent_uuid in renamed_parents:
+            if parent_uuid in self.nodes:
+                self.sort_children(self.nodes[parent_uuid])
+
+    def sorted_position(self, parent_node: TreeNode, name) -> TreeNode | None:
+        """First child of `parent_node` that sorts after `name`, to insert before it (None = append)."""
+        key = (name or "").lower()
+        for child in parent_node.children:
+            if (child.data.name or "").lower() > key:
+                return child
+        return None
+
+    def sort_children(self, parent_node: TreeNode):
+        """Re-sort children by name in place (stable), keeping their subtrees and expansion state.
+
+        Textual has no API to move a node, so this reorders its child list and invalidates the tree.
+        """
+        parent_node._children.sort(key=lambda child: (child.data.name or "").lower())
+        self._invalidate()
+
+    def remove_node(self, node: TreeNode):
+        """Remove a node and its subtree from the tree and from the UUID index."""
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            if current.data:
+                self.nodes.pop(current.data.UUID, None)
+            stack.extend(current.children)
+        node.remove()
+
     def on_tree_node_expanded(self, message: Tree.NodeExpanded) -> None:
-        self.expanded_nodes.add(message.node.id)
+        if message.node.data:
+            self.expanded_nodes.add(message.node.data.UUID)
+        self.run_worker(partial(self.expand_worker, message.node), group="children", exit_on_error=False)
+
+    async def expand_worker(self, node: TreeNode):
+        await self.load_children(node)
+        self.prefetch(node.children[:PREFETCH_CHILDREN])
+
+    def on_tree_node_highlighted(self, message: Tree.NodeHighlighted) -> None:
+        """Prefetch the record under the cursor and its neighbours above and below."""
+        node = message.node
+        self.prefetch([node, node.previous_sibling, node.next_sibling])
+
+    async def load_preview_worker(self, record_UUID: str, rectype: str):
+        """Worker body: wait out the debounce, load the record on the DB threads, show it."""
+        await asyncio.sleep(PREVIEW_DEBOUNCE)
+        await prefetcher.wait_for(record_UUID)  # ✅ The highlighted record may be prefetching already
+        preview = await aio.load_preview(record_UUID, rectype)
+        self.show_preview(record_UUID, preview)
+
+    def show_preview(self, record_UUID: str, preview):
+        """Store loaded content in the app state unless another record was selected meanwhile."""
+        if record_UUID != app_state.current_UUID:
+            return
+        if preview is None:
+            log_message(f"Failed to fetch content for {record_UUID}", "warning")
+            app_state.current_content_markdown = ""
+        else:
+            app_state.current_content, app_state.current_content_markdown = preview
+            log_message(f"Rendered Markdown for {app_state.current_rectype} {record_UUID}", "info")
+        self.post_message(self.PreviewLoaded(record_UUID))
+
+    def prefetch(self, nodes):
+        records = {node.data.UUID: node.data.rectype for node in nodes
+                   if node is not None and node.data is not None and node.data.type == "record"}
+        if records:
+            prefetcher.schedule(self.app, records)
 
     def on_tree_node_collapsed(self, message: Tree.NodeCollapsed) -> None:
-        self.expanded_nodes.discard(message.node.id)
+        if message.node.data:
+            self.expanded_nodes.discard(message.node.data.UUID)
 
     def key_right(self) -> None:
         """Expand current node on →"""
@@ -76,9 +314,9 @@ class RecordTree(Tree):
     def render_label(self, node, base_style: Style, style: Style) -> Text:
         """Render a label while preserving expand/collapse icons and applying genus styles."""
 
-        data = node.data or {}
-        rectype = data.get("rectype", "default")
-        node_type = data.get("type", "record")  # "genus" or "record"
+        data = node.data
+        node_type = data.type if data else "record"  # "genus" or "record"
+        rectype = data.rectype if node_type == "record" and data else "default"
 
         # Preserve expand/collapse icons
         icon = self.ICON_NODE_EXPANDED if node.is_expanded else self.ICON_NODE
@@ -107,7 +345,7 @@ class RecordTree(Tree):
             node_style = Style(color="#b8c0e0", bold=True)  # Selected is bold green
 
         # selected node style
-        if node.data and node.data.get("selected", False):
+        if node.data and node.data.selected:
             node_style = node_style + Style(bold=True,bgcolor="#363a4f",color="#8aadf4")  # Or use color/background
 
         # Preserve Textual cursor/highlight effects
@@ -116,14 +354,77 @@ class RecordTree(Tree):
         # Render the label with all styles
         return Text(label_text, style=full_style)
 
-    def populate_tree(self):
-        """Recursively build the tree structure from the database, with each genus as a separate root."""
+    @staticmethod
+    def record_label(record) -> str:
+        info = metadata.rectype(record["rectype_id"])
+        record_icon = info.icon
+        record_name = record.get("name", "Unnamed")
+        if info.name == "topic":
+            return f"{record_icon}   {record_name}"  # ✅ Extra spacing for topics
+        return f"{record_icon} {record_name}"  # Default format
+
+    @staticmethod
+    def genus_label(genus) -> Text:
+        return Text(f"󰩳  {genus['name']}", style="bold yellow")  # ✅ Genus label with Nerd Font icon
+
+    def add_record_node(self, parent_node: TreeNode, record, before: TreeNode | None = None) -> TreeNode:
+        """Add one record row (from `fetch_tree_data` or `fetch_children`) under `parent_node`."""
+        # ✅ In lazy mode the expand arrow comes from the child count aggregate
+        node = parent_node.add(
+            self.record_label(record),
+            data=RecordNodeData(record["UUID"], record.get("name", "Unnamed"), record["rectype_id"], loaded=not self.lazy),
+            before=before,
+            allow_expand=bool(record["child_count"]) if self.lazy else True,
+        )
+        self.nodes[record["UUID"]] = node
+        return node
+
+    def update_record_node(self, node: TreeNode, record) -> bool:
+        """Relabel a node in place if its record changed. Returns True if its name changed."""
+        name = record.get("name", "Unnamed")
+        renamed = node.data.name != name
+        if renamed or node.data.rectype_id != record["rectype_id"]:
+            node.data.name, node.data.rectype_id = name, record["rectype_id"]
+            node.set_label(self.record_label(record))
+        if self.lazy:
+            node.allow_expand = bool(record["child_count"]) or bool(node.children)
+        return renamed
+
+    def add_genus_node(self, genus, before: TreeNode | None = None) -> TreeNode:
+        node = self.root.add(
+            self.genus_label(genus),
+            data=GenusNodeData(genus["UUID"], genus["name"], genus["description"], genus["genus_type_id"],
+                               loaded=not self.lazy),
+            before=before,
+            allow_expand=bool(genus["child_count"]) if self.lazy else True,
+        )
+        self.nodes[genus["UUID"]] = node
+        return node
+
+    async def load_children(self, node: TreeNode):
+        """Lazy mode: fetch and add the children of `node` the first time it is expanded."""
+        if not self.lazy or not node.data or node.data.loaded:
+            return
+        node.data.loaded = True  # ✅ Set before awaiting, so a second expand does not load again
+        try:
+            children = await aio.fetch_children(node.data.UUID)
+        except BaseException:
+            node.data.loaded = False  # Retried on the next expand
+            raise
+        if self.nodes.get(node.data.UUID) is not node:
+            return  # Removed by a refresh meanwhile
+        for record in sorted(children, key=lambda r: (r["name"] or "").lower()):
+            if record["UUID"] not in self.nodes:  # A refresh may have added it meanwhile
+                self.add_record_node(node, record)
+
+    def populate_tree(self, data):
+        """Build the tree with each genus as a separate root from `data` (`genera`, `records`; no records in lazy mode)."""
         self.clear()  # Ensure we start fresh
+        self.nodes = {}
 
-        record_nodes = {}
         records_by_parent = {}
 
-        for record in self.data["records"]:
+        for record in data["records"]:
             parent_id = record["parent_UUID"]
             if parent_id not in records_by_parent:
                 records_by_parent[parent_id] = []
@@ -135,54 +436,12 @@ class RecordTree(Tree):
                 return  # No children for this parent
 
             for record in sorted(records_by_parent[parent_id], key=lambda r: (r["name"] or "").lower()):
-
-                record_icon = record.get("icon", " ")  
-                record_name = record.get("name", "Unnamed")
-                render_class = record.get("content_render_class", "default")  # ✅ Get class from DB
-
-
-
-                rectype = record.get("rectype", "default")
-                if rectype == "topic":
-                    label_text = f"{record_icon}   {record_name}"  # ✅ Extra spacing for topics
-                else:
-                    label_text = f"{record_icon} {record_name}"  # Default format
-
-                # ✅ Apply the class as text style instead of set_class()
-                record_label = label_text
-                node = parent_node.add(record_label)  # ✅ Assign styled text to node
-                # ✅ Store record data
-                node.data = {
-                    "UUID": record["UUID"],
-                    "icon": record_icon,
-                    "name": record_name,
-                    "rectype": record["rectype"],
-                    "content_schema": record["content_schema"],
-                    "content_caption": record["content_caption"],
-                    "content_render_class": render_class,
-                    "type": "record",
-                }
-
-
-                record_nodes[record["UUID"]] = node
+                node = self.add_record_node(parent_node, record)
                 add_records(node, record["UUID"])  # Recursively add child records
 
-        for genus in sorted(self.data["genera"], key=lambda g: g["name"].lower()):
-            genus_name = genus["name"]
-
-            # ✅ Assign genus label with Nerd Font icon
-            genus_label = Text(f"󰩳  {genus_name}", style="bold yellow")
-
-            genus_node = self.root.add(genus_label)
-
-            genus_node.data = {
-                "UUID": genus["UUID"],
-                "name": genus["name"],
-                "description": genus["description"],
-                "genus_type_id": genus["genus_type_id"],
-                "type": "genus",
-            }
-
+        genera = data["genera"]
+        for genus in sorted(genera, key=lambda g: g["name"].lower()):
+            genus_node = self.add_genus_node(genus)
             add_records(genus_node, genus["UUID"])  # Populate genus-level records
 
     def on_tree_node_selected(self, event: Tree.NodeSelected) -> None:
@@ -194,8 +453,8 @@ class RecordTree(Tree):
             return
 
         node_data = selected_node.data
-        selected_uuid = node_data.get("UUID")
-        node_type = node_data.get("type")
+        selected_uuid = node_data.UUID
+        node_type = node_data.type
 
         log_message(f"Node data: {node_data}", "debug")
         log_message(f"Selected UUID: {selected_uuid}", "info")
@@ -203,32 +462,35 @@ class RecordTree(Tree):
         if node_type == "record" and selected_uuid:
             # ✅ Record selected
             app_state.current_UUID = selected_uuid
-            app_state.current_rectype = node_data.get("rectype")
-            app_state.current_render_class = node_data.get("content_render_class")
-            app_state.current_content_caption = node_data.get("content_caption")
-            app_state.current_schema = node_data.get("content_schema")
-            app_state.current_record_name = node_data.get("name")
-            app_state.current_content_markdown = reactive("")  # Reset
+            app_state.current_rectype = node_data.rectype
+            app_state.current_render_class = node_data.content_render_class
+            app_state.current_content_caption = node_data.content_caption
+            app_state.current_schema = node_data.content_schema
+            app_state.current_record_name = node_data.name
             app_state.current_genus_UUID = None  # Clear genus selection
+            app_state.current_content = None  # ✅ Nothing to edit or embed until the preview arrives
 
-            content_instance = fetch_content(selected_uuid)
-            if content_instance:
-                log_message(f"Fetched content for {selected_uuid}: {content_instance.content}", "info")
-                markdown = render_markdown(content_instance)
-                app_state.current_content_markdown = markdown
-                log_message(f"Rendered Markdown for {app_state.current_rectype} {selected_uuid}", "info")
+            cached = content_cache.get(selected_uuid)
+            if cached is not None and cached.markdown is not None:
+                # ✅ Cached and rendered (viewed or prefetched): show it at once, no query
+                self.workers.cancel_group(self, "preview")
+                self.show_preview(selected_uuid, (cached.content, cached.markdown))
             else:
-                log_message(f"Failed to fetch content for {selected_uuid}", "warning")
+                # ✅ Load in a worker; a newer selection cancels this one during the debounce
+                app_state.current_content_markdown = PREVIEW_PLACEHOLDER
+                self.run_worker(partial(self.load_preview_worker, selected_uuid, node_data.rectype),
+                                group="preview", exclusive=True, exit_on_error=False)
 
         elif node_type == "genus" and selected_uuid:
             # ✅ Genus selected
-            log_message(f"Selected genus: {node_data.get('name')} ({selected_uuid})", "info")
+            self.workers.cancel_group(self, "preview")
+            log_message(f"Selected genus: {node_data.name} ({selected_uuid})", "info")
 
             app_state.current_UUID = None
             app_state.current_rectype = None
             app_state.current_genus_UUID = selected_uuid
 
-            genus_markdown = f"# {node_data['name']}\n\n{node_data['description']}"
+            genus_markdown = f"# {node_data.name}\n\n{node_data.description}"
             app_state.current_content_markdown = genus_markdown
             app_state.current_render_class = "default-markdown"
 
@@ -0,0 +1,115 @@
+import os
+import numpy as np
+
+##############################################################################################
+################# APPROXIMATE NEAREST NEIGHBOURS: IVF-FLAT WITH K-MEANS LISTS ################
+##############################################################################################
+
+# Configuration (environment), trading recall for latency
+ANN_MODE = os.getenv("CLIO_ANN", "off").lower()              # "ivf" enables approximate search
+ANN_NPROBE = int(os.getenv("CLIO_ANN_NPROBE", "8"))          # Lists scanned per query: higher = better recall, slower
+ANN_NLIST = int(os.getenv("CLIO_ANN_NLIST", "0"))            # Number of lists; 0 = 4 * sqrt(corpus size)
+ANN_MIN_SIZE = int(os.getenv("CLIO_ANN_MIN_SIZE", "5000"))   # Below this, exact search is used
+
+ASSIGN_CHUNK = 8192  # Rows scored against the centroids at once while assigning
+
+
+class IVFIndex:
+    """Inverted-file partitioning of an `EmbeddingIndex`, with one list assignment per matrix row.
+
+    Vectors are unit length, so spherical k-means is used: nearest centroid = highest dot product.
+    A query scores only the rows of the `nprobe` lists whose centroids are closest to it.
+    """
+
+    def __init__(self, nlist: int = ANN_NLIST, nprobe: int = ANN_NPROBE):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.centroids = None
+        self.trained_size = 0
+        self._assignments = np.empty(0, dtype=np.int32)  # Aligned with the index rows, grown by doubling
+
+    @property
+    def trained(self) -> bool:
+        return self.centroids is not None
+
+    def needs_training(self, size: int) -> bool:
+        """Untrained, or the corpus has doubled or halved since the centroids were computed."""
+        return not self.trained or size > 2 * self.trained_size or size < self.trained_size // 2
+
+    def train(self, matrix: np.ndarray, iterations: int = 10, seed: int = 0):
+        """Run k-means on a sample of `matrix`, then assign every row to its list."""
+        size = matrix.shape[0]
+        nlist = min(self.nlist or max(1, int(4 * np.sqrt(size))), size)
+        rng = np.random.default_rng(seed)
+
+        sample_size = min(size, max(nlist * 64, 10_000))
+        sample = np.asarray(matrix[np.sort(rng.choice(size, sample_size, replace=False))] if sample_size < size else matrix)
+        centroids = sample[rng.choice(sample_size, nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            labels = self._nearest(sample, centroids)
+            order = np.argsort(labels, kind="stable")
+            lists, starts = np.unique(labels[order], return_index=True)
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            centroids[lists] = sums / norms  # Empty lists keep their previous centroid
+
+        self.centroids = centroids
+        self.trained_size = size
+        self._assignments = np.empty(max(16, size), dtype=np.int32)
+        self._assignments[:size] = self._nearest(matrix, centroids)
+
+    @staticmethod
+    def _nearest(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        """Index of the closest centroid for each row, scored in bounded chunks."""
+        labels = np.empty(vectors.shape[0], dtype=np.int32)
+        for start in range(0, vectors.shape[0], ASSIGN_CHUNK):
+            labels[start:start + ASSIGN_CHUNK] = np.argmax(vectors[start:start + ASSIGN_CHUNK] @ centroids.T, axis=1)
+        return labels
+
+############################## ROW-ALIGNED UPDATES ##############################
+
+    def set(self, row: int, vector: np.ndarray):
+        """Assign an inserted or replaced row to its nearest list."""
+        if row >= self._assignments.shape[0]:
+            grown = np.empty(max(16, row * 2), dtype=np.int32)
+            grown[:self._assignments.shape[0]] = self._assignments
+            self._assignments = grown
+        self._assignments[row] = int(np.argmax(self.centroids @ vector))
+
+    def move(self, source: int, target: int):
+        """Mirror `EmbeddingIndex.remove`, which moves the last row into a freed slot."""
+        self._assignments[target] = self._assignments[source]
+
+    def candidates(self, query: np.ndarray, size: int, nprobe: int | None = None) -> np.ndarray:
+        """Rows in the `nprobe` lists closest to `query`."""
+        nprobe = min(nprobe or self.nprobe, self.centroids.shape[0])
+        probes = np.argpartition(self.centroids @ query, -nprobe)[-nprobe:]
+        probed = np.zeros(self.centroids.shape[0], dtype=bool)
+        probed[probes] = True
+        return np.flatnonzero(probed[self._assignments[:size]])
+
+############################## PERSISTENCE ##############################
+
+    def save(self, path: str, size: int):
+        """Write centroids and the assignments of the first `size` rows."""
+        with open(path, "wb") as file:
+            np.savez(file, centroids=self.centroids, assignments=self._assignments[:size], trained_size=self.trained_size)
+
+    def load(self, path: str, size: int) -> bool:
+        """Restore a saved partitioning if it matches an index of `size` rows."""
+        try:
+            with np.load(path) as saved:
+                centroids, assignments, trained_size = saved["centroids"], saved["assignments"], int(saved["trained_size"])
+        except (OSError, ValueError, KeyError):
+            return False
+
+        if assignments.shape[0] != size:
+            return False
+
+        self.centroids = centroids
+        self.trained_size = trained_size
+        self._assignments = np.empty(max(16, size), dtype=np.int32)
+        self._assignments[:size] = assignments
+        return True
@@ -0,0 +1,214 @@
+import json
+import os
+import threading
+import numpy as np
+from .ann import IVFIndex, ANN_MODE, ANN_MIN_SIZE
+
+##############################################################################################
+############################## IN-MEMORY EMBEDDING INDEX #####################################
+##############################################################################################
+
+EMBEDDING_MODEL = "text-embedding-ada-002"
+
+# On-disk copy of the index, next to the log file
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".clio")
+
+
+def normalize(vector) -> np.ndarray:
+    """Return `vector` as a unit-length float32 array (zero vectors are left as zeros)."""
+    vec = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+class EmbeddingIndex:
+    """Pre-normalized float32 matrix of record embeddings, searched with one matrix-vector product."""
+
+    def __init__(self, model: str = EMBEDDING_MODEL):
+        self.model = model
+        self.loaded = False
+        self._data = np.empty((0, 0), dtype=np.float32)  # Row buffer, grown by doubling
+        self._size = 0
+        self.uuids: list[str] = []
+        self.positions: dict[str, int] = {}  # rec_UUID -> row
+        self.ivf = IVFIndex() if ANN_MODE == "ivf" else None  # Optional approximate search
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """View of the populated rows."""
+        return self._data[:self._size]
+
+    def load(self, rows):
+        """Replace the index with `(rec_UUID, vector)` rows, e.g. from `fetch_embeddings()`."""
+        uuids, vectors = [], []
+        for rec_UUID, vector in rows:
+            uuids.append(rec_UUID)
+            vectors.append(np.asarray(vector, dtype=np.float32))
+
+        with self._lock:
+            if vectors:
+                matrix = np.vstack(vectors)
+                norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+                norms[norms == 0] = 1.0
+                self._data = matrix / norms
+            else:
+                self._data = np.empty((0, 0), dtype=np.float32)
+            self._size = len(uuids)
+            self.uuids = uuids
+            self.positions = {uuid: row for row, uuid in enumerate(uuids)}
+            self.loaded = True
+            if self.ivf:
+                self.ivf = IVFIndex()  # Retrained on the next approximate search
+
+    def _make_writable(self):
+        """Copy a memory-mapped matrix into RAM before the first in-place change."""
+        if not self._data.flags.writeable:
+            self._data = np.array(self._data)
+
+    def upsert(self, rec_UUID: str, vector):
+        """Insert or replace the vector of one record."""
+        vec = normalize(vector)
+        with self._lock:
+            row = self.positions.get(rec_UUID)
+            if row is not None and np.array_equal(self._data[row], vec):
+                return  # Unchanged; keeps a memory-mapped matrix mapped
+
+            self._make_writable()
+            if row is not None:
+                self._data[row] = vec
+                if self.ivf and self.ivf.trained:
+                    self.ivf.set(row, vec)
+                return
+
+            if self._size == 0 and self._data.shape[1] != vec.shape[0]:
+                self._data = np.empty((16, vec.shape[0]), dtype=np.float32)
+            elif self._size == self._data.shape[0]:
+                grown = np.empty((max(16, self._size * 2), self._data.shape[1]), dtype=np.float32)
+                grown[:self._size] = self._data[:self._size]
+                self._data = grown
+
+            self._data[self._size] = vec
+            if self.ivf and self.ivf.trained:
+                self.ivf.set(self._size, vec)
+            self.positions[rec_UUID] = self._size
+            self.uuids.append(rec_UUID)
+            self._size += 1
+
+    def remove(self, rec_UUIDs):
+        """Drop records from the index; the last row is moved into each freed slot."""
+        if not rec_UUIDs:
+            return
+        with self._lock:
+            for rec_UUID in rec_UUIDs:
+                row = self.positions.pop(rec_UUID, None)
+                if row is None:
+                    continue
+                self._make_writable()  # ✅ Copy a memory-mapped matrix only when a row really goes
+                last = self._size - 1
+                if row != last:
+                    moved = self.uuids[last]
+                    self._data[row] = self._data[last]
+                    if self.ivf and self.ivf.trained:
+                        self.ivf.move(last, row)
+                    self.uuids[row] = moved
+                    self.positions[moved] = row
+                self.uuids.pop()
+                self._size -= 1
+
+############################## DISK CACHE ##############################
+
+    def cache_paths(self) -> tuple[str, str, str]:
+        """Paths of the `.npy` matrix, its JSON sidecar (UUIDs, watermark) and the IVF lists."""
+        base = os.path.join(CACHE_DIR, f"embeddings-{self.model}")
+        return f"{base}.npy", f"{base}.json", f"{base}.ivf.npz"
+
+    def open_cache(self) -> str | None:
+        """Memory-map the cached matrix read-only. Returns the stored watermark, or None if no usable cache."""
+        matrix_path, sidecar_path, ivf_path = self.cache_paths()
+        try:
+            with open(sidecar_path, "r") as file:
+                sidecar = json.load(file)
+            matrix = np.load(matrix_path, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+        uuids = sidecar.get("uuids", [])
+        if sidecar.get("model") != self.model or matrix.ndim != 2 or matrix.shape[0] != len(uuids):
+            return None
+
+        with self._lock:
+            self._data = matrix
+            self._size = len(uuids)
+            self.uuids = list(uuids)
+            self.positions = {uuid: row for row, uuid in enumerate(self.uuids)}
+            self.loaded = True
+            if self.ivf:
+                self.ivf = IVFIndex()
+                self.ivf.load(ivf_path, self._size)
+
+        return sidecar.get("watermark")
+
+    def save_cache(self, watermark: str | None):
+        """Write the matrix and sidecar atomically so a concurrent reader never sees a partial file."""
+        matrix_path, sidecar_path, ivf_path = self.cache_paths()
+        os.makedirs(CACHE_DIR, exist_ok=True)
+
+        with self._lock:
+            with open(f"{matrix_path}.tmp", "wb") as file:
+                np.save(file, np.ascontiguousarray(self.matrix))
+            with open(f"{sidecar_path}.tmp", "w") as file:
+                json.dump({"model": self.model, "watermark": watermark, "uuids": self.uuids}, file)
+            if self.ivf and self.ivf.trained:
+                self.ivf.save(f"{ivf_path}.tmp", self._size)
+                os.replace(f"{ivf_path}.tmp", ivf_path)
+
+        os.replace(f"{matrix_path}.tmp", matrix_path)
+        os.replace(f"{sidecar_path}.tmp", sidecar_path)
+
+############################## SEARCH ##############################
+
+    def prepare_ann(self) -> bool:
+        """(Re)train the IVF lists if approximate search is enabled and due. Returns True if trained."""
+        with self._lock:
+            if not self.ivf or self._size < ANN_MIN_SIZE or not self.ivf.needs_training(self._size):
+                return False
+            self.ivf.train(self.matrix)
+            return True
+
+    def search(self, query_vector, top_n: int = 5, nprobe: int | None = None, exact: bool = False) -> list[tuple[str, float]]:
+        """Return the `top_n` most similar records as `(rec_UUID, cosine similarity)` pairs.
+
+        With `CLIO_ANN=ivf` and a large enough corpus only the `nprobe` closest IVF lists are
+        scored; pass `exact=True` to always scan every row.
+        """
+        with self._lock:
+            if self._size == 0 or top_n <= 0:
+                return []
+
+            query = normalize(query_vector)
+
+            if not exact and self.ivf and self._size >= ANN_MIN_SIZE:
+                self.prepare_ann()
+                rows = self.ivf.candidates(query, self._size, nprobe)
+                scores = self._data[rows] @ query
+            else:
+                rows = None
+                scores = self.matrix @ query
+
+            if top_n < scores.shape[0]:
+                top = np.argpartition(scores, -top_n)[-top_n:]
+            else:
+                top = np.arange(scores.shape[0])
+            top = top[np.argsort(scores[top])[::-1]]
+
+            if rows is not None:
+                return [(self.uuids[rows[i]], float(scores[i])) for i in top]
+            return [(self.uuids[row], float(scores[row])) for row in top]
+
+
+# Process-wide index, opened by `load_embedding_index` and kept current by `save_embeddings`
+embedding_index = EmbeddingIndex()
@@ -1,56 +1,65 @@
-import openai
+import hashlib
 import json
-from sqlalchemy.sql import text
-from ..db.db import get_db
-from clio.markdown import render_markdown
-from clio.state import app_state
-from clio.logging import log_message
-
-# OpenAI Model Name
-EMBEDDING_MODEL = "text-embedding-ada-002"
-
-def generate_embedding(record_uuid: str):
-    """Generate and store OpenAI embeddings for a record."""
-    
-    # ✅ Step 1: Fetch the record content
-    with next(get_db()) as db:
-        query = text("SELECT content_schema FROM record WHERE UUID = :uuid")
-        result = db.execute(query, {"uuid": record_uuid}).fetchone()
-    
-    if not result:
-        log_message(f"Error: Record {record_uuid} not found.", "error")
-        return None
-    
-    markdown_text = render_markdown(result["content_schema"])  # ✅ Convert to Markdown
-
-    # ✅ Step 2: Call OpenAI API to generate embedding
-    openai.api_key = "YOUR_OPENAI_API_KEY"
-    
-    try:
-        response = openai.Embedding.create(
-            model=EMBEDDING_MODEL,
-            input=markdown_text
-        )
-        embedding_vector = response["data"][0]["embedding"]
-
-    except Exception as e:
-        log_message(f"OpenAI API Error: {e}", "error")
-        return None
-
-    # ✅ Step 3: Store embedding in the database
-    with next(get_db()) as db:
-        insert_query = text("""
-            INSERT INTO embeddings (rec_UUID, embedding, model)
-            VALUES (:uuid, :embedding, :model)
-            ON DUPLICATE KEY UPDATE embedding = :embedding, model = :model;
-        """)
-        db.execute(insert_query, {
-            "uuid": record_uuid,
-            "embedding": json.dumps(embedding_vector),
-            "model": EMBEDDING_MODEL
-        })
-        db.commit()
-
-    log_message(f"Stored embedding for {record_uuid}", "info")
-    return embedding_vecto
+import threading
+import time
+from openai import OpenAI
+from clio.utils.embedding_index import EMBEDDING_MODEL
 
+##############################################################################################
+################################ OPENAI EMBEDDING REQUESTS ###################################
+##############################################################################################
+
+MAX_INPUT_CHARS = 24_000  # ~8k tokens, the per-input limit of text-embedding-ada-002
+
+
+def content_fields(schema) -> list[str]:
+    """Content columns of a rectype, as used by `fetch_content`."""
+    schema = json.loads(schema) if isinstance(schema, str) else (schema or {})
+    fields = schema.get("content", ["content"])
+    return [fields] if isinstance(fields, str) else list(fields)
+
+
+def embedding_text(content: dict) -> str:
+    """Text that is embedded for a record: its non-empty content fields, one per line."""
+    return "\n".join(str(value) for value in content.values() if value)
+
+
+def content_hash(text: str) -> str:
+    """SHA-256 of the exact text sent to the API (cut to `MAX_INPUT_CHARS`), stored in `embeddings.content_hash`."""
+    return hashlib.sha256(text[:MAX_INPUT_CHARS].encode("utf-8")).hexdigest()
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for batching and rate limiting."""
+    return len(text) // 4 + 1
+
+
+def embed_texts(texts: list[str], client: OpenAI | None = None, model: str = EMBEDDING_MODEL) -> list[list[float]]:
+    """Embed many inputs with a single API call; results are in input order."""
+    client = client or OpenAI()
+    response = client.embeddings.create(input=[text[:MAX_INPUT_CHARS] for text in texts], model=model)
+    return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `acquire(n)` blocks until `n` tokens are available."""
+
+    def __init__(self, rate_per_minute: float):
+        self.capacity = rate_per_minute
+        self.rate = rate_per_minute / 60.0
+        self.tokens = rate_per_minute
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        amount = min(amount, self.capacity)  # A single oversized request must still get through
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
@@ -1,6 +1,7 @@
 from loguru import logger
 import os
 import sys
+import threading
 from ..ui.widgets.log_widget import LoggerWidget
 
 # ✅ Get the correct project root directory
@@ -52,7 +53,15 @@ def log_message(content: str, level="info"):
 
     # ✅ Ensure LoggerWidget receives formatted messages
     if LoggerWidget.instance and "sqlalchemy" not in content.lower():
-        LoggerWidget.instance.write(styled_message)
+        widget = LoggerWidget.instance
+        if threading.current_thread() is threading.main_thread():
+            widget.write(styled_message)
+        else:
+            # ✅ Called from a worker thread: hand the write to the event loop
+            try:
+                widget.app.call_from_thread(widget.write, styled_message)
+            except Exception:
+                pass  # App shutting down; the file log above still has the message
         print("[DEBUG] LoggerWidget updated.")
 
 def get_logger():
@@ -20,9 +20,18 @@ def render_markdown(content_instance):
     log_message(f"app_state.current_content_markdown: {app_state.current_content_markdown}", "info")
 
     rectype = app_state.current_rectype or "UNKNOWN"
-    record_name = content_instance.header.get("title", "Untitled")  # ✅ Use structured header
     content_caption = app_state.current_content_caption or "Content"
-    log_message(f"Rendering Markdown for {rectype}: {record_name}", "debug")
+    log_message(f"Rendering Markdown for {rectype}: {content_instance.header.get('title', 'Untitled')}", "debug")
+
+    markdown_text = build_markdown(content_instance, rectype, content_caption)
+
+    log_message(f"Final Markdown Output:\n{markdown_text}", "debug")
+    return markdown_text
+
+
+def build_markdown(content_instance, rectype: str, content_caption: str) -> str:
+    """Markdown of a content object; no app state involved, so worker threads can use it."""
+    record_name = content_instance.header.get("title", "Untitled")  # ✅ Use structured header
 
     # ✅ Start Markdown text
     markdown_text = f"# {rectype}: {record_name}\n\n"
@@ -59,10 +68,6 @@ def render_markdown(content_instance):
 
                 markdown_text += f"- [{url_title}]({url_href})\n"
 
-
-
-
-    log_message(f"Final Markdown Output:\n{markdown_text}", "debug")
     return markdown_text
 
 
@@ -1,25 +1,82 @@
-from clio.core.state import app_state
 from clio.utils.log_util import log_message
 from ..db.db import get_db
 from sqlalchemy import text
 
-def get_all_descendants(record_uuid):
-    """Retrieve all descendant records of a given record UUID."""
-    descendants = set()
+MAX_TREE_DEPTH = 1000  # Stops the recursion should a move ever have created a cycle
 
-    def fetch_children(parent_uuid):
-        with next(get_db()) as db:
-            query = text("""
-                SELECT record.UUID FROM record 
-                WHERE parent_UUID = :parent_uuid
-            """)
-            children = db.execute(query, {"parent_uuid": parent_uuid}).fetchall()
+# Descendants of `:root_uuid` (a record or a genus) with their depth below it, down to `:max_depth` (NULL = all)
+SUBTREE_DEFINITION = f"""
+    subtree (UUID, parent_UUID, rectype_id, depth) AS (
+        SELECT UUID, parent_UUID, rectype_id, 1 FROM record WHERE parent_UUID = :root_uuid
+        UNION ALL
+        SELECT child.UUID, child.parent_UUID, child.rectype_id, subtree.depth + 1
+        FROM record child
+        JOIN subtree ON child.parent_UUID = subtree.UUID
+        WHERE subtree.depth < COALESCE(:max_depth, {MAX_TREE_DEPTH})
+    )
+"""
 
-            for child in children:
-                child_uuid = child[0]
-                descendants.add(child_uuid)
-                fetch_children(child_uuid)  # ✅ Recursively get deeper children
+# Every record in the trash: trashed records, records of trashed genera, and everything below them
+TRASHED_DEFINITION = f"""
+    trashed (UUID, depth) AS (
+        SELECT UUID, 1 FROM record
+        WHERE trashed_at IS NOT NULL
+           OR parent_UUID IN (SELECT UUID FROM genus WHERE trashed_at IS NOT NULL)
+        UNION ALL
+        SELECT child.UUID, trashed.depth + 1
+        FROM record child
+        JOIN trashed ON child.parent_UUID = trashed.UUID
+        WHERE trashed.depth < {MAX_TREE_DEPTH}
+    )
+"""
 
-    fetch_children(record_uuid)
-    return descendants  # ✅ Returns a set of all child UUIDs
 
+def with_ctes(*definitions: str) -> str:
+    """One `WITH RECURSIVE` clause for several CTE definitions."""
+    return "WITH RECURSIVE " + ",".join(definitions)
+
+
+SUBTREE_CTE = with_ctes(SUBTREE_DEFINITION)
+TRASHED_CTE = with_ctes(TRASHED_DEFINITION)
+
+
+def fetch_trashed_uuids(db) -> set[str]:
+    """UUIDs of all records hidden by the trash, in one query."""
+    return set(db.execute(text(f"{TRASHED_CTE} SELECT DISTINCT UUID FROM trashed")).scalars())
+
+
+def fetch_subtree(db, record_uuid, max_depth: int | None = None, rectype: str | None = None):
+    """Return `UUID, parent_UUID, rectype, depth` rows of all descendants, in one query."""
+    query = text(f"""
+        {SUBTREE_CTE}
+        SELECT subtree.UUID, subtree.parent_UUID, rectype.name AS rectype, subtree.depth
+        FROM subtree
+        JOIN rectype ON subtree.rectype_id = rectype.id
+        WHERE :rectype IS NULL OR rectype.name = :rectype
+    """)
+    return db.execute(query, {"root_uuid": record_uuid, "max_depth": max_depth, "rectype": rectype}).mappings().all()
+
+
+def get_all_descendants(record_uuid, max_depth: int | None = None, rectype: str | None = None):
+    """Retrieve all descendant records of a given record UUID, optionally limited by depth and rectype."""
+    with next(get_db()) as db:
+        rows = fetch_subtree(db, record_uuid, max_depth=max_depth, rectype=rectype)
+    return {row["UUID"] for row in rows}  # ✅ Returns a set of all child UUIDs
+
+
+def subtree_stats(record_uuid) -> dict:
+    """Count descendants per rectype and the depth of the subtree below a record or genus."""
+    with next(get_db()) as db:
+        rows = db.execute(text(f"""
+            {SUBTREE_CTE}
+            SELECT rectype.name AS rectype, COUNT(*) AS records, MAX(subtree.depth) AS depth
+            FROM subtree
+            JOIN rectype ON subtree.rectype_id = rectype.id
+            GROUP BY rectype.name
+        """), {"root_uuid": record_uuid, "max_depth": None}).mappings().all()
+
+    return {
+        "records": sum(row["records"] for row in rows),
+        "depth": max((row["depth"] for row in rows), default=0),
+        "by_rectype": {row["rectype"]: row["records"] for row in rows},
+    }
@@ -76,8 +76,12 @@ DROP TABLE IF EXISTS `embeddings`;
 /*!40101 SET character_set_client = utf8mb4 */;
 CREATE TABLE `embeddings` (
   `rec_UUID` char(36) NOT NULL,
-  `embedding` longtext NOT NULL CHECK (json_valid(`embedding`)),
+  `embedding` longtext DEFAULT NULL CHECK (json_valid(`embedding`)),
+  `vector` blob DEFAULT NULL,
+  `dim` smallint(5) unsigned DEFAULT NULL,
+  `content_hash` char(64) DEFAULT NULL,
   `model` varchar(255) NOT NULL DEFAULT 'text-embedding-ada-002',
+  `modify_date` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
   PRIMARY KEY (`rec_UUID`),
   CONSTRAINT `embeddings_ibfk_1` FOREIGN KEY (`rec_UUID`) REFERENCES `record` (`UUID`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
@@ -113,10 +117,12 @@ CREATE TABLE `genus` (
   `name` varchar(50) NOT NULL,
   `description` varchar(255) DEFAULT NULL,
   `genus_type_id` int(11) NOT NULL,
+  `trashed_at` datetime DEFAULT NULL,
   PRIMARY KEY (`UUID`),
   UNIQUE KEY `shortname` (`name`),
   UNIQUE KEY `name` (`name`),
   KEY `genus_type_id` (`genus_type_id`),
+  KEY `trashed_at` (`trashed_at`),
   CONSTRAINT `genus_ibfk_1` FOREIGN KEY (`genus_type_id`) REFERENCES `genus_type` (`id`) ON DELETE CASCADE
 ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
@@ -137,6 +143,32 @@ CREATE TABLE `genus_type` (
 ) ENGINE=InnoDB AUTO_INCREMENT=2 DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `job`
+--
+
+DROP TABLE IF EXISTS `job`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8mb4 */;
+CREATE TABLE `job` (
+  `id` bigint(20) unsigned NOT NULL AUTO_INCREMENT,
+  `kind` varchar(32) NOT NULL,
+  `rec_UUID` char(36) NOT NULL,
+  `status` enum('pending','running','failed') NOT NULL DEFAULT 'pending',
+  `attempts` smallint(5) unsigned NOT NULL DEFAULT 0,
+  `run_after` datetime NOT NULL DEFAULT current_timestamp(),
+  `locked_by` char(32) DEFAULT NULL,
+  `locked_until` datetime DEFAULT NULL,
+  `last_error` text DEFAULT NULL,
+  `create_date` datetime NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `kind_record` (`kind`,`rec_UUID`),
+  KEY `due` (`kind`,`status`,`run_after`),
+  KEY `rec_UUID` (`rec_UUID`),
+  CONSTRAINT `job_ibfk_1` FOREIGN KEY (`rec_UUID`) REFERENCES `record` (`UUID`) ON DELETE CASCADE
+) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `keyword`
 --
@@ -254,7 +286,12 @@ CREATE TABLE `record` (
   `modify_date` datetime DEFAULT current_timestamp() ON UPDATE current_timestamp(),
   `name` varchar(255) DEFAULT NULL,
   `summary` text DEFAULT NULL,
-  PRIMARY KEY (`UUID`)
+  `trashed_at` datetime DEFAULT NULL,
+  PRIMARY KEY (`UUID`),
+  KEY `parent_UUID` (`parent_UUID`,`trashed_at`),
+  KEY `trashed_at` (`trashed_at`),
+  KEY `rectype_id` (`rectype_id`),
+  KEY `modify_date` (`modify_date`)
 ) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
@@ -294,6 +331,59 @@ CREATE TABLE `rectype` (
 ) ENGINE=InnoDB AUTO_INCREMENT=9 DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
 /*!40101 SET character_set_client = @saved_cs_client */;
 
+--
+-- Table structure for table `relations`
+--
+
+DROP TABLE IF EXISTS `relations`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8mb4 */;
+CREATE TABLE `relations` (
+  `UUID` char(36) NOT NULL,
+  `rec_UUID` char(36) NOT NULL,
+  `rel_rec_UUID` char(36) NOT NULL,
+  `reltype_id` int(11) NOT NULL,
+  `description` varchar(255) DEFAULT NULL,
+  PRIMARY KEY (`UUID`),
+  KEY `rec_reltype` (`rec_UUID`,`reltype_id`),
+  KEY `rel_rec_reltype` (`rel_rec_UUID`,`reltype_id`),
+  KEY `reltype_id` (`reltype_id`),
+  CONSTRAINT `relations_ibfk_1` FOREIGN KEY (`rec_UUID`) REFERENCES `record` (`UUID`) ON DELETE CASCADE,
+  CONSTRAINT `relations_ibfk_2` FOREIGN KEY (`rel_rec_UUID`) REFERENCES `record` (`UUID`) ON DELETE CASCADE,
+  CONSTRAINT `relations_ibfk_3` FOREIGN KEY (`reltype_id`) REFERENCES `reltype` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `reltype`
+--
+
+DROP TABLE IF EXISTS `reltype`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8mb4 */;
+CREATE TABLE `reltype` (
+  `id` int(11) NOT NULL AUTO_INCREMENT,
+  `name` varchar(100) NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `name` (`name`)
+) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
+--
+-- Table structure for table `schema_version`
+--
+
+DROP TABLE IF EXISTS `schema_version`;
+/*!40101 SET @saved_cs_client     = @@character_set_client */;
+/*!40101 SET character_set_client = utf8mb4 */;
+CREATE TABLE `schema_version` (
+  `version` int(11) NOT NULL,
+  `name` varchar(100) NOT NULL,
+  `applied_at` datetime NOT NULL DEFAULT current_timestamp(),
+  PRIMARY KEY (`version`)
+) ENGINE=InnoDB DEFAULT CHARSET=latin1 COLLATE=latin1_swedish_ci;
+/*!40101 SET character_set_client = @saved_cs_client */;
+
 --
 -- Table structure for table `text`
 --